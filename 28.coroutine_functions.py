@@ -543,6 +543,8 @@ Output:
 Explanation:
     The lock ensures only one deposit happens at a time.
     Without the lock, both tasks might modify self.balance simultaneously, causing errors.
+    The lock is held during the whole sleep, so deposits are fully serialized (one deposit per commit).
+    concurrency/group_commit.py shows a group commit version that batches pending deposits into one write.
 
 """
 
@@ -0,0 +1,153 @@
+"""
+map() with an automatically tuned chunksize, streaming over iterables of any length.
+
+pool.map(square, numbers) and executor.map(long_task, numbers) in 30. multiprocessing.py send the items to the
+workers in chunks: ProcessPoolExecutor.map uses chunksize=1 (one pickled message and one result per item) and
+Pool.map guesses a chunksize from len(numbers) (so it has to read the whole input first). For tiny tasks the
+pickling and the pipe dominate, for long tasks big chunks leave workers idle at the end.
+
+adaptive_map(pool, fn, iterable) picks the chunksize from the measured cost of the task:
+
+    - It starts with a few single-item chunks; each chunk is timed inside the worker, so the measurement is the
+      task itself and not the queueing.
+    - The per-item cost is a moving average of those timings, and every new chunk gets
+      chunksize = target_seconds / cost_per_item items (clamped to [1, max_chunksize]), so one chunk is about
+      `target_seconds` of work: long enough to hide the IPC, short enough to balance the load.
+    - It streams like Pool.imap: the input is consumed lazily, only `2 * workers` chunks are in flight, and results
+      come back in input order, so an unbounded iterable (a generator, itertools.count()) works. Closing the
+      generator early cancels the chunks that haven't started (executors only, Pool tasks can't be cancelled).
+
+Works with a concurrent.futures executor (submit) or a multiprocessing.Pool (apply_async).
+
+Run it with: python -m concurrency.adaptive_map  (task durations from microseconds to seconds)
+"""
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import time
+
+
+def run_chunk(fn, items):
+    # Runs in a worker: the results and how long the chunk took, measured where it ran
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def submitter(pool):
+    # A submit(fn, *args) returning something with .result(), for executors and for multiprocessing.Pool
+    if hasattr(pool, "submit"):
+        return pool.submit
+
+    class AsyncResult:
+        __slots__ = ("async_result",)
+
+        def __init__(self, async_result):
+            self.async_result = async_result
+
+        def result(self):
+            return self.async_result.get()
+
+    return lambda fn, *args: AsyncResult(pool.apply_async(fn, args))
+
+
+def adaptive_map(pool, fn, iterable, workers=None, target_seconds=0.02, max_chunksize=10_000, samples=None):
+    """Yields fn(item) for every item, in order, sending chunks sized to about `target_seconds` of work."""
+    submit = submitter(pool)
+    workers = workers or getattr(pool, "_max_workers", None) or getattr(pool, "_processes", None) or os.cpu_count() or 1
+    samples = samples or workers  # single-item chunks sent before the first measurement comes back
+    iterator = iter(iterable)
+    in_flight = collections.deque()
+    cost = None  # seconds per item, moving average
+
+    def chunksize():
+        if cost is None:
+            return 1
+        return max(1, min(max_chunksize, int(target_seconds / max(cost, 1e-9))))
+
+    def send():
+        items = list(itertools.islice(iterator, chunksize()))
+        if items:
+            in_flight.append((len(items), submit(run_chunk, fn, items)))
+        return bool(items)
+
+    try:
+        for _ in range(max(samples, 2 * workers)):
+            if not send():
+                break
+        while in_flight:
+            count, future = in_flight.popleft()
+            results, elapsed = future.result()
+            per_item = elapsed / count
+            cost = per_item if cost is None else 0.7 * cost + 0.3 * per_item
+            send()
+            yield from results
+    finally:
+        # Closed early (break, an exception): drop the chunks that haven't started. A Pool's AsyncResult
+        # can't be cancelled, those chunks still run and their results are discarded.
+        for _, future in in_flight:
+            if hasattr(future, "cancel"):
+                future.cancel()
+
+
+def busy(seconds):
+    # A CPU-bound task of a given duration (sleep() is not precise below a millisecond)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return seconds
+
+
+def sleepy(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def square(n):
+    return n * n
+
+
+if __name__ == '__main__':
+    workers = max(2, os.cpu_count() or 1)
+    cases = (("square (~0.1 us)", square, list(range(200_000))),
+             ("busy 10 us", busy, [10e-6] * 20_000),
+             ("busy 1 ms", busy, [1e-3] * 400),
+             ("sleep 50 ms", sleepy, [0.05] * 40),
+             ("sleep 1 s", sleepy, [1.0] * 4))
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor, multiprocessing.Pool(workers) as pool:
+        executor.submit(square, 1).result()
+        for name, fn, items in cases:
+            line = [f"{name:<18} x{len(items):<7}"]
+            expected = [fn(item) for item in items[:3]]
+            for label, run in (("executor.map", lambda: executor.map(fn, items)),
+                               ("Pool.map", lambda: pool.map(fn, items)),
+                               ("adaptive (executor)", lambda: adaptive_map(executor, fn, items)),
+                               ("adaptive (Pool)", lambda: adaptive_map(pool, fn, items))):
+                start = time.perf_counter()
+                results = list(run())
+                line.append(f"{label} {time.perf_counter() - start:6.2f}s")
+                assert results[:3] == expected and len(results) == len(items)
+            print(" | ".join(line))
+
+        # Unbounded input: stops whenever the consumer stops
+        squares = adaptive_map(executor, square, itertools.count())
+        print("First squares of itertools.count():", list(itertools.islice(squares, 8)))
+
+
+"""
+Key Points
+
+Chunking:
+    One message carries many items, the IPC cost per item shrinks with the chunk size.
+
+Measured, not guessed:
+    The chunksize follows the measured cost of one item, cheap tasks get big chunks, slow tasks get chunks of one.
+
+Streaming:
+    The input is read lazily and a bounded number of chunks is in flight, so memory stays flat for endless inputs.
+
+Order:
+    Chunks are collected in the order they were sent, results come out in input order like map().
+"""
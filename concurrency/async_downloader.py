@@ -0,0 +1,248 @@
+"""
+A real asyncio image downloader, with no dependency outside the standard library.
+
+download_file(semaphore, file_id) in 28.coroutine_functions.py only pretends to download with asyncio.sleep(),
+and 29. multithreading.py downloads with one thread per request. AsyncDownloader does the real thing on one
+event loop:
+
+    - HTTP/1.1 by hand over asyncio.open_connection(): a GET request, the status line, the headers, then a body
+      delimited by Content-Length or sent with Transfer-Encoding: chunked.
+    - Keep-alive: finished connections go back to a small per-host pool and are reused by the next request,
+      unless the server answered with "Connection: close".
+    - Bounded fan-out: every URL becomes a task, but an asyncio.Semaphore lets only `limit` of them talk to the
+      network at the same time.
+    - Streaming writes: chunks are collected into writes of `write_size` bytes (1 MiB) and written through a
+      small thread pool (run_in_executor), so a slow disk never blocks the event loop and a large image costs a
+      few executor round trips instead of one per 64 KiB chunk.
+
+Run it with: python -m concurrency.async_downloader  (benchmarks it against the thread version on a local server)
+"""
+import asyncio
+import concurrent.futures
+import os
+import time
+from urllib.parse import urlsplit
+
+from concurrency.downloader import image_name
+
+
+class HTTPError(Exception):
+    pass
+
+
+class ConnectionPool:
+    # Idle keep-alive connections, per (host, port)
+    def __init__(self, per_host=8):
+        self.per_host = per_host
+        self.idle = {}
+
+    async def acquire(self, host, port):
+        connections = self.idle.get((host, port))
+        while connections:
+            reader, writer = connections.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(host, port)
+        return reader, writer, False
+
+    def release(self, host, port, reader, writer):
+        connections = self.idle.setdefault((host, port), [])
+        if len(connections) < self.per_host:
+            connections.append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        writers = [writer for connections in self.idle.values() for _, writer in connections]
+        self.idle.clear()
+        for writer in writers:
+            writer.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+async def read_headers(reader):
+    status_line = (await reader.readline()).decode("latin-1").strip()
+    if not status_line:
+        raise ConnectionResetError("Connection closed before the response")
+    _, status, *reason = status_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return int(status), " ".join(reason), headers
+
+
+async def iter_body(reader, headers, chunk_size):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # trailers
+                    pass
+                return
+            remaining = size
+            while remaining:
+                chunk = await reader.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise ConnectionResetError("Connection closed in the middle of a chunk")
+                remaining -= len(chunk)
+                yield chunk
+            await reader.readline()
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining:
+            chunk = await reader.read(min(chunk_size, remaining))
+            if not chunk:
+                raise ConnectionResetError("Connection closed before the end of the body")
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        while chunk := await reader.read(chunk_size):  # body ends when the server closes
+            yield chunk
+
+
+class AsyncDownloader:
+    def __init__(self, folder="images", limit=16, chunk_size=64 * 1024, write_size=1024 * 1024, writers=4, timeout=30):
+        self.folder = folder
+        self.limit = limit
+        self.chunk_size = chunk_size
+        self.write_size = write_size
+        self.timeout = timeout
+        self.writers = writers
+        self.pool = ConnectionPool(per_host=limit)
+        self.reused = 0
+        self.opened = 0
+
+    async def fetch_to_file(self, url, path, executor):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Only plain http:// URLs are supported: {url}")
+        host, port = parts.hostname, parts.port or 80
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+
+        for attempt in (1, 2):
+            reader, writer, reused = await self.pool.acquire(host, port)
+            keep_alive = False
+            try:
+                try:
+                    writer.write(f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                                 f"Connection: keep-alive\r\nUser-Agent: learning-python\r\n\r\n".encode("latin-1"))
+                    await writer.drain()
+                    status, reason, headers = await read_headers(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if not reused or attempt == 2:
+                        raise
+                    continue  # The server closed an idle keep-alive connection, retry once on a fresh one
+
+                self.reused += reused
+                self.opened += not reused
+                if status != 200:
+                    raise HTTPError(f"{status} {reason} for {url}")
+                size = await self.write_body(reader, headers, path, executor)
+                delimited = "content-length" in headers or headers.get("transfer-encoding", "").lower() == "chunked"
+                keep_alive = delimited and headers.get("connection", "").lower() != "close"
+                return size
+            finally:
+                # Only a connection that delivered a complete response goes back to the pool, any error (a bad
+                # response, a timeout cancelling us mid-body) closes it
+                if keep_alive:
+                    self.pool.release(host, port, reader, writer)
+                else:
+                    writer.close()
+
+    async def write_body(self, reader, headers, path, executor):
+        # Chunks are collected into writes of `write_size` bytes: one executor round trip per write, not per chunk
+        loop = asyncio.get_running_loop()
+        size = 0
+        buffer = bytearray()
+        file = await loop.run_in_executor(executor, open, path, "wb")
+        try:
+            async for chunk in iter_body(reader, headers, self.chunk_size):
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) >= self.write_size:
+                    await loop.run_in_executor(executor, file.write, buffer)
+                    buffer.clear()
+            if buffer:
+                await loop.run_in_executor(executor, file.write, buffer)
+        finally:
+            await loop.run_in_executor(executor, file.close)
+        return size
+
+    async def download_image(self, semaphore, img_url, executor):
+        img_path = os.path.join(self.folder, image_name(img_url))
+        temporary = f"{img_path}.part-{id(asyncio.current_task())}"
+        async with semaphore:
+            try:
+                size = await asyncio.wait_for(self.fetch_to_file(img_url, temporary, executor), self.timeout)
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+        os.replace(temporary, img_path)
+        return img_path, size
+
+    async def download_all(self, img_urls):
+        os.makedirs(self.folder, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.limit)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.writers) as executor:
+            try:
+                return await asyncio.gather(*(self.download_image(semaphore, url, executor) for url in img_urls))
+            finally:
+                await self.pool.close()
+
+
+if __name__ == '__main__':
+    import filecmp
+    import tempfile
+
+    from concurrency.downloader import AdaptiveDownloader
+    from concurrency.local_server import IMAGES, image_urls, serve
+
+    with serve(IMAGES, latency=0.05) as base_url:
+        img_urls = image_urls(base_url) * 8
+
+        with tempfile.TemporaryDirectory() as folder:
+            t1 = time.perf_counter()
+            AdaptiveDownloader(folder, max_workers=16).download_all(img_urls)
+            t2 = time.perf_counter()
+            print(f"Threads (AdaptiveDownloader): {len(img_urls)} images in {t2 - t1:.2f} seconds")
+
+        with tempfile.TemporaryDirectory() as folder:
+            downloader = AsyncDownloader(folder, limit=16)
+            t1 = time.perf_counter()
+            asyncio.run(downloader.download_all(img_urls))
+            t2 = time.perf_counter()
+            print(f"asyncio (AsyncDownloader):    {len(img_urls)} images in {t2 - t1:.2f} seconds, "
+                  f"{downloader.opened} connections opened, {downloader.reused} reused")
+
+            names = sorted(os.listdir(IMAGES))
+            _, mismatch, errors = filecmp.cmpfiles(IMAGES, folder, names, shallow=False)
+            print(f"Files identical to the originals: {not mismatch and not errors}")
+
+
+"""
+Key Points
+
+Raw HTTP/1.1:
+    asyncio.open_connection() gives a StreamReader / StreamWriter pair, the request and the response parsing are plain text.
+
+Keep-alive:
+    A connection is returned to the pool after a complete response, the next request skips the TCP handshake.
+
+Semaphore-bounded fan-out:
+    All downloads are scheduled at once with gather(), the semaphore decides how many run concurrently.
+
+Thread-offloaded writes:
+    File writes go through run_in_executor() in batches, the event loop keeps serving sockets while the disk works.
+"""
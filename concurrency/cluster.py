@@ -0,0 +1,328 @@
+"""
+A process pool that spans machines: ClusterExecutor, built on multiprocessing.managers.
+
+30. multiprocessing.py stops at the cores of one machine. ClusterExecutor keeps the ProcessPoolExecutor API
+(submit(), map(), shutdown(), `with`) but its workers are separate agent processes that connect over TCP, on this
+machine or on others:
+
+    - The executor runs a BaseManager server in a background thread. It shares one object, the Scheduler, which
+      holds the pending tasks, which worker runs what, and when every worker was last heard from.
+    - A worker agent (run_worker(), or `python -m concurrency.cluster worker HOST:PORT`) connects with the
+      authkey, claims one task at a time, runs it and reports the result. A separate thread sends a heartbeat
+      every second, also while a long task is running.
+    - A reaper thread on the executor side drops workers that missed their heartbeats for `heartbeat_timeout`
+      seconds (the process was killed, the machine went away) and puts their running tasks back at the front of
+      the queue. A task is retried on another worker up to `max_retries` times, then its future fails with WorkerLost.
+    - Tasks and results travel pickled: functions must be importable by the workers (module-level functions in
+      a module they can import; workers started with start_workers() are forked and see __main__ too).
+
+Try it on localhost: python -m concurrency.cluster  (3 local workers, one of them killed mid-task)
+Or by hand:          executor = ClusterExecutor(("0.0.0.0", 6000), authkey=b"secret")
+                     python -m concurrency.cluster worker server-host:6000 secret   (on every machine)
+"""
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import pickle
+import socket
+import sys
+import threading
+import time
+import uuid
+from multiprocessing.managers import BaseManager
+
+STOP = "stop"  # claim() answer once the executor shut down
+
+
+class WorkerLost(Exception):
+    pass
+
+
+class ClusterManager(BaseManager):
+    # The worker side: knows the name of the shared object, the executor registers the real one
+    pass
+
+
+ClusterManager.register("get_scheduler")
+
+
+class Scheduler:
+    # Lives in the executor's process, workers call its methods through manager proxies
+    def __init__(self, heartbeat_timeout, max_retries, on_start, on_result):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_retries = max_retries
+        self.on_start = on_start  # task_id -> False if the future was cancelled
+        self.on_result = on_result  # (task_id, pickled (ok, value))
+        self.condition = threading.Condition()
+        self.pending = collections.deque()  # (task_id, payload)
+        self.running = {}  # task_id -> (worker_id, payload)
+        self.attempts = collections.Counter()
+        self.workers = {}  # worker_id -> time of the last heartbeat
+        self.stopped = False
+
+    def add(self, task_id, payload):
+        with self.condition:
+            self.pending.append((task_id, payload))
+            self.condition.notify()
+
+    def heartbeat(self, worker_id):
+        with self.condition:
+            self.workers[worker_id] = time.monotonic()
+            return not self.stopped
+
+    def claim(self, worker_id, timeout=1.0):
+        # The next task as (task_id, payload), None if nothing came in `timeout` seconds, STOP after shutdown
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.workers[worker_id] = time.monotonic()
+            while True:
+                while not self.pending and not self.stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.condition.wait(remaining)
+                if not self.pending:
+                    return STOP
+                task_id, payload = self.pending.popleft()
+                if self.attempts[task_id] == 0 and not self.on_start(task_id):
+                    continue  # cancelled before it started
+                self.attempts[task_id] += 1
+                self.running[task_id] = (worker_id, payload)
+                return task_id, payload
+
+    def complete(self, worker_id, task_id, outcome):
+        with self.condition:
+            entry = self.running.get(task_id)
+            if entry is None or entry[0] != worker_id:
+                return  # the task was given to another worker after this one was declared dead
+            del self.running[task_id]
+            del self.attempts[task_id]
+        self.on_result(task_id, outcome)
+
+    def reap(self):
+        # Drop silent workers and requeue their tasks, returns the ids of the lost workers
+        failed = []
+        with self.condition:
+            now = time.monotonic()
+            dead = {worker for worker, seen in self.workers.items() if now - seen > self.heartbeat_timeout}
+            for worker in dead:
+                del self.workers[worker]
+            for task_id, (worker, payload) in list(self.running.items()):
+                if worker in dead:
+                    del self.running[task_id]
+                    if self.attempts[task_id] > self.max_retries:
+                        del self.attempts[task_id]
+                        failed.append((task_id, worker))
+                    else:
+                        self.pending.appendleft((task_id, payload))
+                        self.condition.notify()
+        for task_id, worker in failed:
+            error = WorkerLost(f"task {task_id} lost with worker {worker} after {self.max_retries} retries")
+            self.on_result(task_id, pickle.dumps((False, error)))
+        return dead
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def status(self):
+        with self.condition:
+            return {"workers": sorted(self.workers), "pending": len(self.pending), "running": len(self.running)}
+
+
+class ClusterExecutor(concurrent.futures.Executor):
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, heartbeat_timeout=5.0, max_retries=2):
+        self.authkey = authkey or os.urandom(16)
+        self.futures = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.scheduler = Scheduler(heartbeat_timeout, max_retries, self.start_future, self.set_result)
+
+        # A manager class of our own, so every executor serves its own scheduler
+        server_class = type("ClusterServer", (BaseManager,), {})
+        server_class.register("get_scheduler", callable=lambda: self.scheduler)
+        self.server = server_class(address, self.authkey).get_server()
+        self.address = self.server.address
+        # Accept connections ourselves instead of serve_forever(), which ends with sys.exit() and whose accepter
+        # can't be stopped. stop_event also ends the client connections at shutdown.
+        self.server.stop_event = threading.Event()
+        self.accepter = threading.Thread(target=self.accept, name="cluster-server", daemon=True)
+        self.accepter.start()
+        self.reaper = threading.Thread(target=self.reap, args=(heartbeat_timeout / 2,), name="cluster-reaper", daemon=True)
+        self.reaper.start()
+        self.local_workers = []
+
+    def accept(self):
+        while not self.server.stop_event.is_set():
+            try:
+                connection = self.server.listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                continue  # a failed handshake, or the wake-up connection of shutdown()
+            threading.Thread(target=self.server.handle_request, args=(connection,), daemon=True).start()
+
+    def start_future(self, task_id):
+        with self.lock:
+            future = self.futures.get(task_id)
+            if future is not None and not future.set_running_or_notify_cancel():
+                del self.futures[task_id]
+                return False
+        return future is not None
+
+    def set_result(self, task_id, outcome):
+        with self.lock:
+            future = self.futures.pop(task_id, None)
+        if future is None:
+            return
+        ok, value = pickle.loads(outcome)
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def reap(self, interval):
+        while not self.closed:
+            time.sleep(interval)
+            self.scheduler.reap()
+
+    def submit(self, fn, /, *args, **kwargs):
+        payload = pickle.dumps((fn, args, kwargs))
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            task_id = next(self.ids)
+            future = self.futures[task_id] = concurrent.futures.Future()
+        self.scheduler.add(task_id, payload)
+        return future
+
+    def start_workers(self, count):
+        # Worker agents on this machine, as child processes
+        for _ in range(count):
+            process = multiprocessing.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+            process.start()
+            self.local_workers.append(process)
+        return self.local_workers[-count:]
+
+    def status(self):
+        return self.scheduler.status()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self.lock:
+            self.closed = True
+            futures = list(self.futures.values())
+        if cancel_futures:
+            for future in futures:
+                future.cancel()
+        if wait:
+            concurrent.futures.wait(futures)
+        self.scheduler.stop()
+        for process in self.local_workers:
+            process.join(5)
+        self.server.stop_event.set()
+        try:
+            # accept() doesn't notice a closed socket, a connection wakes it up to see stop_event
+            socket.create_connection(self.address, timeout=1).close()
+        except OSError:
+            pass
+        self.accepter.join(5)
+        self.server.listener.close()
+
+
+def outcome_of(payload):
+    # Unpickling is part of the task: a task that can't be loaded fails, it doesn't take the worker down
+    try:
+        fn, args, kwargs = pickle.loads(payload)
+        return pickle.dumps((True, fn(*args, **kwargs)))
+    except Exception as exc:
+        try:
+            return pickle.dumps((False, exc))
+        except Exception:
+            return pickle.dumps((False, RuntimeError(repr(exc))))
+
+
+def run_worker(address, authkey, worker_id=None, heartbeat_interval=1.0):
+    """A worker agent: connects to a ClusterExecutor and runs tasks until it shuts down."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    manager = ClusterManager(tuple(address), authkey)
+    manager.connect()
+    scheduler = manager.get_scheduler()
+    done = threading.Event()
+
+    def heartbeat():
+        # Proxies open one connection per thread, the heartbeat doesn't wait behind a running task
+        try:
+            while not done.wait(heartbeat_interval):
+                if not scheduler.heartbeat(worker_id):
+                    return
+        except (EOFError, OSError):
+            done.set()
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        while not done.is_set():
+            task = scheduler.claim(worker_id, 1.0)
+            if task == STOP:
+                break
+            if task is None:
+                continue
+            task_id, payload = task
+            scheduler.complete(worker_id, task_id, outcome_of(payload))
+    except (EOFError, OSError):
+        pass  # the executor went away
+    finally:
+        done.set()
+
+
+def long_task(n):
+    time.sleep(1)  # Simulate a long computation
+    return n * n
+
+
+def whoami(n):
+    time.sleep(0.05)
+    return os.getpid()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+        host, port = sys.argv[2].rsplit(":", 1)
+        run_worker((host, int(port)), sys.argv[3].encode())
+        sys.exit()
+
+    import signal
+
+    with ClusterExecutor(heartbeat_timeout=2.0) as executor:
+        workers = executor.start_workers(3)
+        print("Serving on", executor.address)
+
+        start = time.perf_counter()
+        print("map:", list(executor.map(long_task, [1, 2, 3, 4, 5, 6])), f"in {time.perf_counter() - start:.2f}s")
+        print("Tasks per worker pid:", collections.Counter(executor.map(whoami, range(60))))
+
+        # Kill a worker while it runs a task: its task is retried on another worker after the heartbeat timeout
+        start = time.perf_counter()
+        futures = [executor.submit(long_task, n) for n in range(3)]
+        time.sleep(0.5)
+        os.kill(workers[0].pid, signal.SIGKILL)
+        print("After killing a worker:", [future.result() for future in futures],
+              f"in {time.perf_counter() - start:.2f}s, status: {executor.status()}")
+
+
+"""
+Key Points
+
+Managers:
+    BaseManager serves Python objects over TCP, workers call the scheduler's methods through proxies as if it were local.
+
+Pull, not push:
+    Workers claim tasks when they are free, fast workers simply claim more.
+
+Heartbeats:
+    A worker proves it is alive every second from a separate thread, silence means it is gone.
+
+Retry:
+    Tasks of a lost worker go back to the front of the queue, a result from a worker that was already given up on is ignored.
+"""
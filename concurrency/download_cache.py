@@ -0,0 +1,211 @@
+"""
+A content-addressed cache for the image downloads of 29. multithreading.py.
+
+Running the lesson again downloads every URL again and overwrites images/<id>.jpg, even when nothing changed.
+DownloadCache remembers what it fetched:
+
+    - Objects: every payload is stored once under its SHA-256, objects/ab/abcdef....
+      Two URLs with identical bodies (like the three 404 pages in images/) share one object.
+    - Index: index.json maps each URL to its object hash, ETag, Last-Modified and the time it was checked.
+    - Skip: a URL checked less than `max_age` seconds ago is not requested at all.
+    - Revalidate: an older entry is requested with If-None-Match / If-Modified-Since, and a 304 Not Modified
+      answer costs no body at all.
+    - Output files are hardlinks to the objects (a copy when the filesystem can't link),
+      so duplicates take no extra disk space.
+    - Objects are read-only (0o444), so writing to an output file in place (open(path, 'wb') like the lesson's
+      download_image()) fails instead of changing the cached copy. Root ignores file modes, so an object is also
+      re-hashed before it is trusted, and a corrupted one is dropped and downloaded again.
+
+Run it with: python -m concurrency.download_cache  (three passes over images/ served by the local server)
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+from concurrency.downloader import image_name
+
+
+class DownloadCache:
+    def __init__(self, directory=".download-cache", max_age=0, chunk_size=64 * 1024, timeout=30):
+        self.directory = directory
+        self.objects = os.path.join(directory, "objects")
+        self.index_path = os.path.join(directory, "index.json")
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = {"skipped": 0, "not_modified": 0, "downloaded": 0, "deduplicated": 0, "corrupted": 0}
+
+        os.makedirs(self.objects, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    def session(self):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def verified(self, digest):
+        # True if the object exists and still has the content its name promises
+        sha256 = hashlib.sha256()
+        try:
+            with open(self.object_path(digest), "rb") as f:
+                while chunk := f.read(self.chunk_size):
+                    sha256.update(chunk)
+        except FileNotFoundError:
+            return False
+        if sha256.hexdigest() == digest:
+            return True
+        self.count("corrupted")
+        os.remove(self.object_path(digest))
+        return False
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def save(self):
+        # Write the index atomically, a crash keeps the previous version
+        with self.lock:
+            data = json.dumps(self.index, indent=2, sort_keys=True)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(temporary, self.index_path)
+
+    def fetch(self, url):
+        """Returns the path of the cached object holding the body of `url`."""
+        with self.lock:
+            entry = self.index.get(url)
+        if entry is not None and self.verified(entry["sha256"]):
+            if time.time() - entry["checked"] < self.max_age:
+                self.count("skipped")
+                return self.object_path(entry["sha256"])
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry, headers = None, {}
+
+        with self.session().get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304 and entry is not None:
+                self.count("not_modified")
+                entry = dict(entry, checked=time.time())
+                digest = entry["sha256"]
+            else:
+                response.raise_for_status()
+                digest = self.store(response)
+                self.count("downloaded")
+                entry = {
+                    "sha256": digest,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "size": os.path.getsize(self.object_path(digest)),
+                    "checked": time.time(),
+                }
+        with self.lock:
+            self.index[url] = entry
+        return self.object_path(digest)
+
+    def store(self, response):
+        # Stream the body to a temporary file while hashing it, then move it to its content address
+        sha256 = hashlib.sha256()
+        fd, temporary = tempfile.mkstemp(dir=self.objects, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    sha256.update(chunk)
+                    f.write(chunk)
+            digest = sha256.hexdigest()
+            path = self.object_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.verified(digest):
+                self.count("deduplicated")  # Same payload as another URL, keep the existing object
+                os.remove(temporary)
+            else:
+                os.chmod(temporary, 0o444)
+                os.replace(temporary, path)
+            return digest
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def link(self, object_path, destination):
+        # Put the object at `destination` as a hardlink, unless it is already there
+        if os.path.exists(destination) and os.path.samefile(object_path, destination):
+            return
+        temporary = f"{destination}.link-{threading.get_ident()}"
+        try:
+            os.link(object_path, temporary)
+        except OSError:
+            shutil.copyfile(object_path, temporary)  # e.g. the cache lives on another filesystem
+        os.replace(temporary, destination)
+
+    def download_image(self, img_url, folder):
+        img_path = os.path.join(folder, image_name(img_url))
+        self.link(self.fetch(img_url), img_path)
+        return img_path
+
+    def download_all(self, img_urls, folder="images", max_workers=None):
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(lambda url: self.download_image(url, folder), img_urls))
+        finally:
+            self.save()
+
+
+if __name__ == '__main__':
+    import filecmp
+
+    from concurrency.local_server import IMAGES, image_urls, serve
+
+    with serve(IMAGES, latency=0.05) as base_url, tempfile.TemporaryDirectory() as workdir:
+        img_urls = image_urls(base_url)
+        folder = os.path.join(workdir, "images")
+        cache_dir = os.path.join(workdir, "cache")
+
+        for label, max_age in (("first run", 0), ("second run (revalidate)", 0), ("third run (max_age=60)", 60)):
+            cache = DownloadCache(cache_dir, max_age=max_age)
+            t1 = time.perf_counter()
+            cache.download_all(img_urls, folder)
+            t2 = time.perf_counter()
+            print(f"{label:<24}: {t2 - t1:.2f} seconds, {cache.stats}")
+
+        objects = sum(len(files) for _, _, files in os.walk(os.path.join(cache_dir, "objects")))
+        names = sorted(os.listdir(IMAGES))
+        _, mismatch, errors = filecmp.cmpfiles(IMAGES, folder, names, shallow=False)
+        print(f"{len(names)} files stored as {objects} objects, identical to the originals: {not mismatch and not errors}")
+
+
+"""
+Key Points
+
+Content addressing:
+    The file name of an object is the hash of its bytes, identical payloads are stored once.
+
+Conditional requests:
+    ETag / Last-Modified from the last download are sent back, the server answers 304 when nothing changed.
+
+Hardlinks:
+    images/<id>.jpg and the cached object are the same file on disk, no copy is made.
+    That is why objects are read-only and checked against their hash before use.
+"""
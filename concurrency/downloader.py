@@ -0,0 +1,189 @@
+"""
+An adaptive version of the ThreadPoolExecutor image downloader from 29. multithreading.py.
+
+download_image() in the lesson calls requests.get(img_url).content: a new connection for every image, the
+whole body in memory, and a fixed number of threads. AdaptiveDownloader changes three things:
+
+    1. Connection reuse: every worker thread owns one requests.Session (threading.local), so the TCP
+       connection to the server is kept alive and reused for all the images that worker downloads.
+    2. Streaming: the body is read with iter_content() in chunks and written to a temporary file that
+       is renamed when complete, memory stays at one chunk per worker and no half image is left behind.
+    3. Adaptive concurrency: the number of threads is fixed, the pool always has `max_workers` of them. What
+       adapts is a gate (ConcurrencyLimit, a resizable semaphore) that lets only `limit` threads download at
+       the same time, the others wait in front of it without touching the network. After every download the
+       latency (time to the response headers) is compared with the fastest one seen so far. While it stays close the server keeps up: the
+       limit doubles at first (slow start, so a big list doesn't spend its first seconds at `min_workers`)
+       and grows by one after the first back-off. When it gets much slower the server is saturated and the
+       limit shrinks by a quarter (additive increase, multiplicative decrease).
+
+Run it with: python -m concurrency.downloader  (downloads `images/` from a local server, no internet needed)
+"""
+import concurrent.futures
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def image_name(img_url):
+    # The lesson uses the unique image identifier as the file name
+    name = os.path.basename(urlsplit(img_url).path)
+    return name if os.path.splitext(name)[1] else f"{name}.jpg"
+
+
+class ConcurrencyLimit:
+    # A semaphore whose size can change while threads are waiting on it
+    def __init__(self, limit, minimum, maximum):
+        self.limit = limit
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def __exit__(self, *exc):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    def resize(self, limit):
+        with self.condition:
+            self.limit = max(self.minimum, min(self.maximum, limit))
+            self.condition.notify_all()
+
+
+class AdaptiveDownloader:
+    def __init__(self, folder="images", min_workers=2, max_workers=32, chunk_size=64 * 1024, timeout=30):
+        self.folder = folder
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.limit = ConcurrencyLimit(min_workers, min_workers, max_workers)
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = threading.Lock()
+
+        self.fastest = None  # best latency seen, the "empty network" baseline
+        self.average = None  # moving average of recent latencies
+        self.slow_start = True  # double the limit until the server first shows it is saturated
+
+    def session(self):
+        # One keep-alive session (and connection pool of one) per worker thread
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def observe(self, latency):
+        with self.lock:
+            self.fastest = latency if self.fastest is None else min(self.fastest, latency)
+            self.average = latency if self.average is None else 0.8 * self.average + 0.2 * latency
+            if self.average < 1.5 * self.fastest:
+                self.limit.resize(self.limit.limit * 2 if self.slow_start else self.limit.limit + 1)
+            elif self.average > 2.5 * self.fastest:
+                self.slow_start = False
+                self.limit.resize(self.limit.limit * 3 // 4)
+
+    def download_image(self, img_url):
+        img_path = os.path.join(self.folder, image_name(img_url))
+        temporary = f"{img_path}.part-{threading.get_ident()}"
+        with self.limit:
+            start = time.perf_counter()
+            try:
+                with self.session().get(img_url, stream=True, timeout=self.timeout) as response:
+                    # Time to the response headers: how long the server took to start answering. The body time
+                    # depends on the image size (29 bytes .. 3.6 MB here) and would hide the server's load.
+                    latency = time.perf_counter() - start
+                    response.raise_for_status()
+                    size = 0
+                    with open(temporary, "wb") as img_file:
+                        for chunk in response.iter_content(self.chunk_size):
+                            img_file.write(chunk)
+                            size += len(chunk)
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+        os.replace(temporary, img_path)
+        self.observe(latency)
+        return img_path, size, latency
+
+    def download_all(self, img_urls):
+        os.makedirs(self.folder, exist_ok=True)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(self.download_image, img_urls))
+        finally:
+            self.close()
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions.clear()
+
+
+def download_image_lesson(img_url, folder):
+    # The original download_image() of the lesson, for comparison
+    img_bytes = requests.get(img_url).content
+    with open(os.path.join(folder, image_name(img_url)), 'wb') as img_file:
+        img_file.write(img_bytes)
+
+
+if __name__ == '__main__':
+    import filecmp
+    import functools
+    import tempfile
+
+    from concurrency.local_server import IMAGES, image_urls, serve
+
+    with serve(IMAGES, latency=0.05) as base_url:
+        img_urls = image_urls(base_url) * 8  # 8 rounds over the folder, like a bigger list of images
+
+        with tempfile.TemporaryDirectory() as folder:
+            t1 = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                list(executor.map(functools.partial(download_image_lesson, folder=folder), img_urls))
+            t2 = time.perf_counter()
+            print(f"Lesson download_image:  {len(img_urls)} images in {t2 - t1:.2f} seconds")
+
+        with tempfile.TemporaryDirectory() as folder:
+            downloader = AdaptiveDownloader(folder)
+            t1 = time.perf_counter()
+            results = downloader.download_all(img_urls)
+            t2 = time.perf_counter()
+            print(f"AdaptiveDownloader:     {len(results)} images in {t2 - t1:.2f} seconds, "
+                  f"final concurrency limit {downloader.limit.limit}")
+
+            names = sorted(os.listdir(IMAGES))
+            _, mismatch, errors = filecmp.cmpfiles(IMAGES, folder, names, shallow=False)
+            print(f"Files identical to the originals: {not mismatch and not errors}")
+
+
+"""
+Key Points
+
+Connection pooling:
+    One requests.Session per worker keeps its connection alive, no TCP handshake per image.
+
+Streaming writes:
+    iter_content() + a temporary file: bounded memory, and the final file appears only when it is complete.
+
+Adaptive concurrency limit:
+    A fixed pool of threads behind a resizable gate. Latency close to the best seen -> allow more downloads at a
+    time (doubling during slow start, then one more), latency much worse -> back off.
+"""
@@ -0,0 +1,108 @@
+"""
+Group commit for the asyncio BankAccount.
+
+The BankAccount in 28.coroutine_functions.py holds self.lock during the whole `await asyncio.sleep(1)`
+(the simulated write), so N concurrent deposits take N seconds.
+
+GroupCommitBankAccount coalesces them instead:
+    - deposit() adds (amount, future) to a pending list and awaits the future.
+    - One flusher task takes everything that is pending, writes it in a single commit and
+      then resolves every future of that batch with the new balance.
+    - Deposits that arrive while a commit is running wait for the next batch.
+
+One commit still takes the same time, but it carries every deposit that was waiting,
+so throughput grows with the number of concurrent callers.
+
+Run it with: python -m concurrency.group_commit
+"""
+import asyncio
+import time
+
+
+class LockedBankAccount:
+    # The lesson version (without prints): one deposit per commit
+    def __init__(self, commit_delay=1):
+        self.balance = 0
+        self.commit_delay = commit_delay
+        self.lock = asyncio.Lock()
+
+    async def deposit(self, amount):
+        async with self.lock:
+            await asyncio.sleep(self.commit_delay)  # Simulate the durable write
+            self.balance += amount
+            return self.balance
+
+
+class GroupCommitBankAccount:
+    def __init__(self, commit_delay=1):
+        self.balance = 0
+        self.commit_delay = commit_delay
+        self.pending = []
+        self.flusher = None
+        self.commits = 0
+
+    async def deposit(self, amount):
+        if amount <= 0:
+            raise ValueError("Deposit amount must be positive")
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((amount, future))
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self.flush())
+        return await future  # Resolved once the batch holding this deposit is durable
+
+    async def flush(self):
+        # Only this task commits, so no lock is needed around the balance
+        while self.pending:
+            batch, self.pending = self.pending, []
+            total = sum(amount for amount, _ in batch)
+            try:
+                await asyncio.sleep(self.commit_delay)  # One durable write for the whole batch
+            except BaseException as e:
+                # The write failed (or was cancelled): nobody in this batch is committed
+                for _, future in batch + self.pending:
+                    if future.done():
+                        continue
+                    if isinstance(e, Exception):
+                        future.set_exception(e)
+                    else:
+                        future.cancel()
+                self.pending = []
+                raise
+            self.balance += total
+            self.commits += 1
+            for _, future in batch:
+                if not future.done():  # The caller may have been cancelled meanwhile
+                    future.set_result(self.balance)
+
+
+async def main():
+    commit_delay = 0.05
+
+    for concurrency in (1, 10, 100, 1000):
+        for cls in (LockedBankAccount, GroupCommitBankAccount):
+            if cls is LockedBankAccount and concurrency > 100:
+                continue  # 1000 serialized commits would take a while
+            account = cls(commit_delay)
+            start = time.perf_counter()
+            await asyncio.gather(*(account.deposit(100) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            print(f"{cls.__name__:<22} | {concurrency:>4} concurrent deposits | "
+                  f"{elapsed:6.2f}s | {concurrency / elapsed:8,.0f} deposits/sec | balance {account.balance}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
+
+
+"""
+Key Points
+
+Group commit:
+    Many deposits share one expensive write, the cost per deposit drops as concurrency grows.
+
+Per-deposit futures:
+    Every caller still gets its own answer, the future resolves only after its batch is committed.
+
+Single writer:
+    Only the flusher task touches the balance, the lock around the slow write is no longer needed.
+"""
@@ -0,0 +1,134 @@
+"""
+One executor for mixed workloads: I/O tasks on threads, CPU-bound tasks where the GIL can't stop them.
+
+29. multithreading.py explains that threads only help while tasks wait (sleep, network, disk), CPU-bound code
+still runs one thread at a time because of the GIL, and 30. multiprocessing.py moves that work to processes.
+HybridExecutor hides the choice behind a single submit():
+
+    - Functions decorated with @cpu_bound go to the CPU pool, everything else goes to a ThreadPoolExecutor.
+    - The CPU pool is picked once, from what the interpreter supports:
+        "threads"       free-threaded build (python3.13t+ with the GIL disabled): plain threads already use all cores,
+        "interpreters"  concurrent.futures.InterpreterPoolExecutor (3.14+): one GIL per subinterpreter, no new processes,
+        "processes"     ProcessPoolExecutor everywhere else (the function and its arguments must be picklable).
+    - The CPU pool is only started by the first CPU task and is sized to the number of cores, the I/O pool can be
+      much larger since its threads mostly wait.
+
+Run it with: python -m concurrency.hybrid_executor  (a mixed workload against a plain ThreadPoolExecutor)
+"""
+import concurrent.futures
+import functools
+import os
+import sys
+import threading
+import time
+
+
+def cpu_bound(fn):
+    # Tags a function as CPU-bound, HybridExecutor.submit() sends it to the CPU pool
+    fn.cpu_bound = True
+    return fn
+
+
+def is_cpu_bound(fn):
+    while isinstance(fn, functools.partial):
+        fn = fn.func
+    return getattr(fn, "cpu_bound", False)
+
+
+def cpu_backend():
+    if hasattr(sys, "_is_gil_enabled") and not sys._is_gil_enabled():
+        return "threads"
+    if hasattr(concurrent.futures, "InterpreterPoolExecutor"):
+        return "interpreters"
+    return "processes"
+
+
+class HybridExecutor(concurrent.futures.Executor):
+    def __init__(self, io_workers=32, cpu_workers=None, backend=None):
+        self.backend = backend or cpu_backend()
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.io_pool = concurrent.futures.ThreadPoolExecutor(io_workers, thread_name_prefix="io")
+        self.cpu_pool = None
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def cpu(self):
+        with self.lock:
+            if self.closed:
+                # Without this check a CPU task after shutdown() would start a new pool nobody shuts down
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            if self.cpu_pool is None:
+                if self.backend == "threads":
+                    self.cpu_pool = concurrent.futures.ThreadPoolExecutor(self.cpu_workers, thread_name_prefix="cpu")
+                elif self.backend == "interpreters":
+                    self.cpu_pool = concurrent.futures.InterpreterPoolExecutor(self.cpu_workers)
+                else:
+                    self.cpu_pool = concurrent.futures.ProcessPoolExecutor(self.cpu_workers)
+            return self.cpu_pool
+
+    def submit(self, fn, /, *args, **kwargs):
+        # After shutdown() both paths raise RuntimeError: cpu() checks `closed`, the I/O pool checks itself
+        pool = self.cpu() if is_cpu_bound(fn) else self.io_pool
+        return pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self.lock:
+            self.closed = True
+            cpu_pool = self.cpu_pool
+        self.io_pool.shutdown(wait, cancel_futures=cancel_futures)
+        if cpu_pool is not None:
+            cpu_pool.shutdown(wait, cancel_futures=cancel_futures)
+
+
+def do_something(seconds):
+    time.sleep(seconds)
+    return f"Done sleeping for {seconds}."
+
+
+@cpu_bound
+def count_primes(limit):
+    count = 0
+    for n in range(2, limit):
+        for d in range(2, int(n ** 0.5) + 1):
+            if n % d == 0:
+                break
+        else:
+            count += 1
+    return count
+
+
+def mixed_workload(executor):
+    start = time.perf_counter()
+    futures = [executor.submit(count_primes, 60_000) for _ in range(4)]
+    futures += [executor.submit(do_something, 0.5) for _ in range(20)]
+    results = [future.result() for future in futures]
+    return time.perf_counter() - start, results
+
+
+if __name__ == '__main__':
+    print(f"{os.cpu_count()} cores, CPU backend: {cpu_backend()}")
+    with concurrent.futures.ThreadPoolExecutor(32) as executor:
+        elapsed, baseline = mixed_workload(executor)
+        print(f"ThreadPoolExecutor only: {elapsed:.2f}s")
+    with HybridExecutor() as executor:
+        executor.submit(count_primes, 10).result()  # start the CPU pool outside the measurement
+        elapsed, results = mixed_workload(executor)
+        print(f"HybridExecutor:          {elapsed:.2f}s")
+    assert results == baseline
+
+
+"""
+Key Points
+
+One submit():
+    The caller tags CPU-heavy functions once with @cpu_bound, every call site keeps using the same executor.
+
+Right pool for the job:
+    Waiting tasks share a big thread pool, CPU-bound tasks get one worker per core that doesn't share the GIL.
+
+Backend detection:
+    Free-threaded builds need no extra processes, 3.14 subinterpreters avoid process start-up and memory, processes work everywhere.
+
+Lazy start:
+    A workload without CPU tasks never pays for starting the CPU pool.
+"""
@@ -0,0 +1,129 @@
+"""
+A local stand-in for images.unsplash.com, so the download examples run offline.
+
+serve() starts a ThreadingHTTPServer on 127.0.0.1 in a background thread and serves the files of a folder
+(the `images/` folder of the multithreading lesson by default). It speaks HTTP/1.1, so clients can keep the
+connection alive between requests, and it can add an artificial delay to every response to look like a real
+network.
+
+Like a real CDN it sends Last-Modified and ETag headers and answers conditional requests
+(If-Modified-Since / If-None-Match) with 304 Not Modified when the file did not change.
+It also supports single byte ranges (Range: bytes=start-end -> 206 Partial Content) for chunked downloads.
+
+    with serve("images", latency=0.05) as base_url:
+        ...  # download f"{base_url}/photo-1516117172878-fd2c41f4a759.jpg"
+"""
+import functools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+
+
+RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class ImageRequestHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    latency = 0
+    remaining = None  # bytes left to send for a 206 response
+
+    def send_head(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.translate_path(self.path)
+        if os.path.isfile(path) and "If-None-Match" in self.headers:
+            tags = [tag.strip() for tag in self.headers["If-None-Match"].split(",")]
+            etag = file_etag(path)
+            if etag in tags or "*" in tags:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+        if os.path.isfile(path) and "Range" in self.headers:
+            return self.send_range(path)
+        return super().send_head()
+
+    def send_range(self, path):
+        size = os.path.getsize(path)
+        match = RANGE.match(self.headers["Range"].strip())
+        if match is None or match.groups() == ("", ""):
+            return super().send_head()  # not a single byte range, send the whole file
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1  # "bytes=-500" = the last 500 bytes
+        if start >= size or start > end:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        f = open(path, "rb")
+        f.seek(start)
+        self.remaining = end - start + 1
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(self.remaining))
+        self.send_header("ETag", file_etag(path))
+        self.end_headers()
+        return f
+
+    def copyfile(self, source, outputfile):
+        if self.remaining is None:
+            return super().copyfile(source, outputfile)
+        remaining, self.remaining = self.remaining, None
+        while remaining:
+            chunk = source.read(min(64 * 1024, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+    def send_header(self, keyword, value):
+        super().send_header(keyword, value)
+        if keyword == "Last-Modified":  # sent by SimpleHTTPRequestHandler for every file
+            self.send_header("ETag", file_etag(self.translate_path(self.path)))
+            self.send_header("Accept-Ranges", "bytes")
+
+    def log_message(self, format, *args):
+        pass  # keep the benchmark output clean
+
+
+class ImageServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog is 5: more simultaneous new connections get their SYN dropped and retried a
+    # second later, a real CDN doesn't do that to 32 clients
+    request_queue_size = 128
+
+
+def file_etag(path):
+    # Changes whenever the file is rewritten (same idea as nginx: mtime + size)
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def image_urls(base_url, directory=IMAGES):
+    return [f"{base_url}/{name}" for name in sorted(os.listdir(directory))]
+
+
+@contextmanager
+def serve(directory=IMAGES, latency=0, handler=ImageRequestHandler):
+    handler = type(handler.__name__, (handler,), {"latency": latency})
+    server = ImageServer(("127.0.0.1", 0), functools.partial(handler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
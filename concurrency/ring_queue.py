@@ -0,0 +1,222 @@
+"""
+A bounded multi-producer / multi-consumer queue, grown out of the Condition example in 29. multithreading.py.
+
+The lesson's producer() / consumer() share a bare list and one Condition: it handles a single item, and if the
+producer runs first its notify() is lost and the consumer waits forever (it never checks the list before waiting).
+RingQueue fixes both and adds what a real work queue needs:
+
+    - A fixed-size ring buffer (a preallocated list + head index + count), no memory growth and no list shifting.
+    - Two Conditions on the same lock: producers wait on `not_full`, consumers on `not_empty`, so a put only wakes
+      consumers and a get only wakes producers. Every wait is in a `while` loop over the real state, so a
+      notification that happens before the wait can't be missed.
+    - put_many() / get_many() move a whole batch under one lock acquisition.
+    - close(): producers get QueueClosed right away, consumers first drain what is left and then get QueueClosed.
+
+Timeouts raise queue.Full / queue.Empty, like queue.Queue.
+
+Run it with: python -m concurrency.ring_queue  (throughput against queue.Queue)
+"""
+import queue
+import threading
+import time
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class RingQueue:
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        self.head = 0  # index of the oldest item
+        self.count = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.not_full = threading.Condition(self.lock)
+        self.not_empty = threading.Condition(self.lock)
+
+    def __len__(self):
+        with self.lock:
+            return self.count
+
+    def wait_for(self, condition, ready, timeout, error):
+        # Wait until ready() or closed, raising `error` when the timeout expires first
+        if timeout is None:
+            while not ready() and not self.closed:
+                condition.wait()
+        else:
+            deadline = time.monotonic() + timeout
+            while not ready() and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise error
+                condition.wait(remaining)
+
+    # ---- producers ----
+
+    def put(self, item, timeout=None):
+        with self.lock:
+            self.wait_for(self.not_full, lambda: self.count < self.capacity, timeout, queue.Full)
+            if self.closed:
+                raise QueueClosed("put() on a closed queue")
+            self.buffer[(self.head + self.count) % self.capacity] = item
+            self.count += 1
+            self.not_empty.notify()
+
+    def put_many(self, items, timeout=None):
+        # Puts every item, a batch at a time as space frees up. `timeout` applies to each wait.
+        items = list(items)
+        position = 0
+        while position < len(items):
+            with self.lock:
+                self.wait_for(self.not_full, lambda: self.count < self.capacity, timeout, queue.Full)
+                if self.closed:
+                    raise QueueClosed("put_many() on a closed queue")
+                space = min(self.capacity - self.count, len(items) - position)
+                tail = self.head + self.count
+                for i in range(space):
+                    self.buffer[(tail + i) % self.capacity] = items[position + i]
+                self.count += space
+                position += space
+                if space == 1:
+                    self.not_empty.notify()
+                else:
+                    self.not_empty.notify(space)
+
+    # ---- consumers ----
+
+    def get(self, timeout=None):
+        with self.lock:
+            self.wait_for(self.not_empty, lambda: self.count > 0, timeout, queue.Empty)
+            if self.count == 0:  # closed and drained
+                raise QueueClosed("get() on a closed, empty queue")
+            item = self.buffer[self.head]
+            self.buffer[self.head] = None
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+            self.not_full.notify()
+            return item
+
+    def get_many(self, max_items, timeout=None):
+        # Waits for at least one item, then takes up to max_items in one go
+        if max_items < 1:
+            raise ValueError("max_items must be at least 1")
+        with self.lock:
+            self.wait_for(self.not_empty, lambda: self.count > 0, timeout, queue.Empty)
+            if self.count == 0:
+                raise QueueClosed("get_many() on a closed, empty queue")
+            taken = min(max_items, self.count)
+            items = []
+            for _ in range(taken):
+                items.append(self.buffer[self.head])
+                self.buffer[self.head] = None
+                self.head = (self.head + 1) % self.capacity
+            self.count -= taken
+            self.not_full.notify(taken)
+            return items
+
+    # ---- shutdown ----
+
+    def close(self):
+        # Graceful shutdown: wake everybody, no more puts, gets drain the remaining items
+        with self.lock:
+            self.closed = True
+            self.not_full.notify_all()
+            self.not_empty.notify_all()
+
+    def __iter__(self):
+        # for item in q: ... until the queue is closed and drained
+        while True:
+            try:
+                yield self.get()
+            except QueueClosed:
+                return
+
+
+def benchmark(name, make_queue, put, get_all, producers, consumers, items, batch):
+    q = make_queue()
+    received = [0] * consumers
+    per_producer = items // producers
+
+    def produce():
+        for start in range(0, per_producer, batch):
+            put(q, range(start, min(start + batch, per_producer)))
+
+    def consume(index):
+        received[index] = get_all(q)
+
+    producer_threads = [threading.Thread(target=produce) for _ in range(producers)]
+    consumer_threads = [threading.Thread(target=consume, args=(i,)) for i in range(consumers)]
+    start = time.perf_counter()
+    for t in consumer_threads + producer_threads:
+        t.start()
+    for t in producer_threads:
+        t.join()
+    if isinstance(q, RingQueue):
+        q.close()
+    else:
+        for _ in range(consumers):
+            q.put(None)  # one sentinel per consumer
+    for t in consumer_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    assert sum(received) == per_producer * producers
+    print(f"{name:<24} {producers}P/{consumers}C: {sum(received) / elapsed:12,.0f} items/sec")
+
+
+def put_each(q, items):
+    for item in items:
+        q.put(item)
+
+
+def queue_get_all(q):
+    count = 0
+    while q.get() is not None:
+        count += 1
+    return count
+
+
+def ring_get_all(q):
+    return sum(1 for _ in q)
+
+
+def ring_put_many(q, items):
+    q.put_many(items)
+
+
+def ring_get_many_all(q):
+    count = 0
+    try:
+        while True:
+            count += len(q.get_many(256))
+    except QueueClosed:
+        return count
+
+
+if __name__ == '__main__':
+    items = 200_000
+    for producers, consumers in ((1, 1), (4, 4), (8, 2)):
+        benchmark("queue.Queue", lambda: queue.Queue(1024), put_each, queue_get_all, producers, consumers, items, 256)
+        benchmark("RingQueue put/get", lambda: RingQueue(1024), put_each, ring_get_all, producers, consumers, items, 256)
+        benchmark("RingQueue put/get_many", lambda: RingQueue(1024), ring_put_many, ring_get_many_all,
+                  producers, consumers, items, 256)
+
+
+"""
+Key Points
+
+Ring buffer:
+    A fixed list used in a circle, the head moves forward instead of items shifting.
+
+Two conditions, one lock:
+    Producers and consumers sleep on different conditions, every notify wakes a thread that can make progress.
+
+No missed notifications:
+    Waiting always happens in a loop that checks the real state first, like `while not ready(): condition.wait()`.
+
+Batching:
+    put_many / get_many move many items per lock acquisition, which is where most of the cost of a queue is.
+"""
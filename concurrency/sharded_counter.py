@@ -0,0 +1,113 @@
+"""
+A sharded counter, instead of one global lock around `counter += 1`.
+
+The increment() example in 29. multithreading.py takes `with lock:` for every single increment, so all threads
+queue on the same lock 100,000 times each. ShardedCounter gives every thread its own slot:
+
+    - increment() only touches the calling thread's shard (a one-element list found through threading.local),
+      no other thread ever writes to it, so no lock is needed on the hot path.
+    - value() adds up all the shards lazily, only when someone asks for the total. It takes a small registry
+      lock that threads only touch once, when they create their shard.
+    - Optional periodic flush: flush_every=N makes a thread fold its shard into a shared total every N
+      increments, so `flushed` stays roughly current without calling value().
+
+Run it with: python -m concurrency.sharded_counter  (benchmarks it against the global lock at 1..64 threads)
+"""
+import threading
+import time
+
+
+class ShardedCounter:
+    def __init__(self, flush_every=None):
+        self.flush_every = flush_every
+        self.local = threading.local()
+        self.shards = []
+        self.registry = threading.Lock()
+        self.flushed = 0  # total folded in by periodic flushes
+
+    def shard(self):
+        shard = [0]
+        with self.registry:
+            self.shards.append(shard)
+        self.local.shard = shard
+        return shard
+
+    def increment(self, amount=1):
+        try:
+            shard = self.local.shard
+        except AttributeError:
+            shard = self.shard()
+        shard[0] += amount
+        if self.flush_every and shard[0] >= self.flush_every:
+            self.flush(shard)
+
+    def flush(self, shard=None):
+        # Move this thread's count into the shared total
+        shard = shard or getattr(self.local, "shard", None)
+        if shard is None:
+            return
+        with self.registry:
+            self.flushed += shard[0]
+            shard[0] = 0
+
+    def value(self):
+        with self.registry:
+            return self.flushed + sum(shard[0] for shard in self.shards)
+
+
+class LockedCounter:
+    # The lesson version: one global lock taken for every increment
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def increment(self, amount=1):
+        with self.lock:
+            self.count += amount
+
+    def value(self):
+        with self.lock:
+            return self.count
+
+
+def run(counter, threads, increments):
+    def increment():
+        add = counter.increment
+        for _ in range(increments):
+            add()
+
+    workers = [threading.Thread(target=increment) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    total = 640_000
+    for threads in (1, 2, 4, 8, 16, 32, 64):
+        increments = total // threads
+        line = [f"{threads:>2} threads"]
+        for name, counter in (("global lock", LockedCounter()),
+                              ("sharded", ShardedCounter()),
+                              ("sharded+flush", ShardedCounter(flush_every=10_000))):
+            elapsed = run(counter, threads, increments)
+            assert counter.value() == threads * increments
+            line.append(f"{name}: {threads * increments / elapsed / 1e6:5.2f}M/sec")
+        print(" | ".join(line))
+
+
+"""
+Key Points
+
+Sharding:
+    Each thread owns one slot, writes never contend, the lock-free hot path is a single list item update.
+
+Lazy aggregation:
+    The total is only computed when value() is called, reads pay instead of writes.
+
+Periodic flush:
+    Folding a shard into the shared total every N increments costs one lock per N increments instead of one per increment.
+"""
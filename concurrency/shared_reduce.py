@@ -0,0 +1,201 @@
+"""
+A chunked reducer over shared memory, instead of pickling list chunks into every process.
+
+square_sum() in 30. multiprocessing.py gets its chunk as a pickled list argument and prints the total, so the
+parent never sees the results. For big inputs the pickling is the expensive part: every number is copied into a
+message, sent through a pipe and rebuilt in the child.
+
+shared_reduce() sends no data at all:
+
+    - SharedArray keeps the input in a multiprocessing.shared_memory block as a typed buffer ("q" = int64,
+      "d" = float64, any array module typecode), filled once by the parent.
+    - Every worker process gets only names and numbers: the shared block's name, its typecode, and an index range
+      [start, stop). It attaches the block and reduces a memoryview slice of it, which is a window on the same
+      memory, nothing is copied.
+    - Partial results go into a second shared block, one slot per worker: a signed 128-bit integer (or a float64
+      for float inputs) and a status byte. 128 bits hold the square sum of billions of values below 2**48, but
+      not of a few values near the int64 limit (each square is close to 2**126). A partial result that doesn't
+      fit is flagged in its slot and shared_reduce() raises OverflowError, it is never silently wrapped.
+      Float inputs follow float rules and overflow to inf. The parent adds the slots up with Python ints.
+
+Run it with: python -m concurrency.shared_reduce  (against the pickled-chunks version)
+"""
+import array
+import itertools
+import multiprocessing
+import operator
+import os
+import time
+from multiprocessing import shared_memory
+
+SLOT = 24  # bytes per partial result: 16 for the value, 1 status byte, padding
+STATUS = 16  # offset of the status byte in a slot
+OK, OVERFLOW = 0, 1
+
+
+def square_sum_kernel(view):
+    return sum(map(operator.mul, view, view))
+
+
+KERNELS = {
+    "sum": sum,
+    "square_sum": square_sum_kernel,
+}
+
+
+class SharedArray:
+    def __init__(self, length, typecode="q", name=None):
+        self.typecode = typecode
+        self.length = length
+        self.itemsize = array.array(typecode).itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, length * self.itemsize))
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.view = self.shm.buf[:length * self.itemsize].cast(typecode)
+
+    @classmethod
+    def from_iterable(cls, values, length, typecode="q", block=1 << 16):
+        # Fills the shared block a few pages at a time, the full input never exists as a Python list
+        shared = cls(length, typecode)
+        iterator = iter(values)
+        for start in range(0, length, block):
+            chunk = array.array(typecode, itertools.islice(iterator, min(block, length - start)))
+            shared.view[start:start + len(chunk)] = chunk
+        return shared
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.length
+
+
+def partial_reduce(name, typecode, length, start, stop, results_name, slot, kernel):
+    # Runs in a worker process: reduce shared[start:stop] and write the result into its slot
+    shared = SharedArray(length, typecode, name)
+    results = shared_memory.SharedMemory(name=results_name)
+    try:
+        window = shared.view[start:stop]
+        total = KERNELS[kernel](window)
+        window.release()
+        if typecode in "fd":
+            results.buf[slot * SLOT:slot * SLOT + 8].cast("d")[0] = total
+        else:
+            try:
+                results.buf[slot * SLOT:slot * SLOT + STATUS] = int(total).to_bytes(STATUS, "little", signed=True)
+            except OverflowError:
+                results.buf[slot * SLOT + STATUS] = OVERFLOW
+    finally:
+        shared.close()
+        results.close()
+
+
+def shared_reduce(shared, kernel="square_sum", workers=None):
+    if not len(shared):
+        return 0.0 if shared.typecode in "fd" else 0  # both kernels are sums, the empty sum needs no worker
+    workers = max(1, min(workers or os.cpu_count() or 1, len(shared)))
+    step = -(-len(shared) // workers)
+    results = shared_memory.SharedMemory(create=True, size=workers * SLOT)
+    try:
+        processes = [multiprocessing.Process(target=partial_reduce,
+                                             args=(shared.name, shared.typecode, len(shared), start,
+                                                   min(start + step, len(shared)), results.name, slot, kernel))
+                     for slot, start in enumerate(range(0, len(shared), step))]
+        started = []
+        try:
+            for p in processes:
+                p.start()
+                started.append(p)
+        finally:
+            # Every worker is joined before anything is raised: the result block is unlinked below and must not
+            # disappear while a worker is still attached to it
+            for p in started:
+                p.join()
+        for p in processes:
+            if p.exitcode != 0:
+                raise RuntimeError(f"worker {p.name} failed with exit code {p.exitcode}")
+        if shared.typecode in "fd":
+            return sum(results.buf[slot * SLOT:slot * SLOT + 8].cast("d")[0] for slot in range(len(processes)))
+        overflowed = [slot for slot in range(len(processes)) if results.buf[slot * SLOT + STATUS] == OVERFLOW]
+        if overflowed:
+            first, last = overflowed[0] * step, min((overflowed[0] + 1) * step, len(shared)) - 1
+            raise OverflowError(f"{kernel} of elements {first}..{last} doesn't fit in a {8 * STATUS}-bit result slot "
+                                f"({len(overflowed)} of {len(processes)} workers overflowed)")
+        return sum(int.from_bytes(results.buf[slot * SLOT:slot * SLOT + STATUS], "little", signed=True)
+                   for slot in range(len(processes)))
+    finally:
+        results.close()
+        results.unlink()
+
+
+def square_sum(numbers):
+    # The lesson version, returning the total instead of printing it
+    return sum([num ** 2 for num in numbers])
+
+
+def pickled_square_sum(numbers, workers):
+    step = -(-len(numbers) // workers)
+    with multiprocessing.Pool(workers) as pool:
+        return sum(pool.map(square_sum, [numbers[i:i + step] for i in range(0, len(numbers), step)]))
+
+
+if __name__ == '__main__':
+    workers = max(2, os.cpu_count() or 1)
+    numbers = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    with SharedArray.from_iterable(numbers, len(numbers)) as shared:
+        print("Lesson numbers:", shared_reduce(shared, workers=2), "==", square_sum(numbers))
+
+    length = 10_000_000
+    numbers = list(range(length))
+    start = time.perf_counter()
+    expected = pickled_square_sum(numbers, workers)
+    print(f"Pickled chunks ({workers} processes): {time.perf_counter() - start:.2f}s")
+
+    with SharedArray.from_iterable(range(length), length) as shared:
+        start = time.perf_counter()
+        total = shared_reduce(shared, workers=workers)
+        print(f"Shared memory  ({workers} processes): {time.perf_counter() - start:.2f}s")
+    assert total == expected
+
+    with SharedArray.from_iterable((i / 2 for i in range(1000)), 1000, "d") as shared:
+        print("float64 sum:", shared_reduce(shared, "sum", workers))
+
+    with SharedArray.from_iterable([2**63 - 1] * 8, 8) as shared:
+        try:
+            shared_reduce(shared, workers=2)
+        except OverflowError as exc:
+            print("Square sum near the int64 limit:", exc)
+
+
+"""
+Key Points
+
+Shared memory:
+    The input lives in one block that every process maps, workers read it in place instead of receiving a copy.
+
+Index ranges:
+    A task is (name, start, stop): a few bytes to send, whatever the chunk size.
+
+memoryview slices:
+    Slicing a memoryview gives a window on the same buffer, the kernel iterates over it without building a list.
+
+Shared results:
+    Each worker owns one slot of the result block, no locks and no pickled return values, the parent adds the slots.
+    A partial result too big for its 128 bits is flagged in the slot and raised as OverflowError, not truncated.
+"""
@@ -0,0 +1,120 @@
+"""
+submit + as_completed with backpressure: a fixed window of futures instead of one future per task up front.
+
+The submit/as_completed example in 30. multiprocessing.py does
+
+    futures = [executor.submit(long_task, n) for n in numbers]
+
+which creates every Future (and queues every task with its arguments) before the first result is read: for 10M
+numbers that is 10M futures in memory, and a generator as input is consumed completely.
+
+submit_stream(executor, fn, iterable, max_in_flight=...) keeps at most `max_in_flight` tasks submitted:
+
+    - It reads the input lazily and tops the window up whenever a task finishes, so memory depends on the window,
+      not on the number of tasks.
+    - By default it yields results as they finish, like as_completed().
+    - ordered=True yields results in input order, like map(). Results that finish early wait in a reorder buffer.
+      Running tasks count against `max_buffered` too (each of them may end up in the buffer), so a new task is
+      only submitted while running + buffered < max_buffered: the buffer never holds more than `max_buffered`
+      results, however slow the oldest task is.
+    - An exception is raised when its result is reached. Closing the generator early cancels the tasks that
+      haven't started.
+
+Run it with: python -m concurrency.submit_stream  (memory of the full futures list vs the stream)
+"""
+import concurrent.futures
+import itertools
+import os
+
+
+def submit_stream(executor, fn, iterable, max_in_flight=None, ordered=False, max_buffered=None):
+    max_in_flight = max_in_flight or 2 * (getattr(executor, "_max_workers", None) or os.cpu_count() or 1)
+    max_buffered = max_buffered or max_in_flight
+    iterator = iter(iterable)
+    in_flight = {}  # future -> input position
+    buffered = {}  # position -> finished future, waiting for its turn (ordered=True)
+    next_position = 0  # next position to yield (ordered=True)
+    positions = itertools.count()
+
+    def fill():
+        # Unordered results are yielded at once, ordered ones may all have to wait behind the oldest task
+        while len(in_flight) < max_in_flight and (not ordered or len(in_flight) + len(buffered) < max_buffered):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            in_flight[executor.submit(fn, item)] = next(positions)
+
+    try:
+        fill()
+        while in_flight:
+            finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                position = in_flight.pop(future)
+                if not ordered:
+                    yield future.result()
+                else:
+                    buffered[position] = future
+            while next_position in buffered:
+                yield buffered.pop(next_position).result()
+                next_position += 1
+            fill()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def long_task(n):
+    return n * n
+
+
+if __name__ == '__main__':
+    import time
+    import tracemalloc
+
+    tasks = 200_000
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        tracemalloc.start()
+        start = time.perf_counter()
+        futures = [executor.submit(long_task, n) for n in range(tasks)]
+        total = sum(future.result() for future in concurrent.futures.as_completed(futures))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"futures list:  {time.perf_counter() - start:5.2f}s  peak {peak / 2**20:7.1f} MiB")
+        del futures
+
+        for ordered in (False, True):
+            tracemalloc.start()
+            start = time.perf_counter()
+            streamed = sum(submit_stream(executor, long_task, range(tasks), max_in_flight=64, ordered=ordered))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"submit_stream: {time.perf_counter() - start:5.2f}s  peak {peak / 2**20:7.1f} MiB  (ordered={ordered})")
+            assert streamed == total
+
+    # The lesson's process pool, with a generator as input and results in order
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        print("In order:", list(submit_stream(executor, long_task, (n for n in range(1, 11)), ordered=True)))
+
+        # Unbounded input: read only as far as the consumer goes
+        for result in submit_stream(executor, long_task, itertools.count(), max_in_flight=8):
+            if result > 1000:
+                print("First result over 1000 (in completion order):", result)
+                break
+
+
+"""
+Key Points
+
+Backpressure:
+    New tasks are only submitted when old ones finish, the producer can't run ahead of the workers.
+
+Fixed window:
+    At most max_in_flight futures exist at a time, 10M tasks use the same memory as 100.
+
+Reorder buffer:
+    Early results wait for the slower ones before them, running tasks count against the cap, so the buffer can't outgrow it.
+
+Lazy input:
+    The iterable is consumed one item at a time, generators and endless inputs work.
+"""
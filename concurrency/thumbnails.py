@@ -0,0 +1,164 @@
+"""
+A parallel thumbnail pipeline for the JPEGs downloaded into images/.
+
+Decoding, resizing and re-encoding images is CPU-bound, so (as 30. multiprocessing.py explains) threads don't
+help because of the GIL, processes do. The pipeline:
+
+    - Streams the file list with os.scandir(), nothing is collected up front.
+    - Skips an image in the parent process when its thumbnail exists and is newer than the source (mtime),
+      so unchanged images don't even cost a message to a worker.
+    - Sends images to a ProcessPoolExecutor in batches of `batch_size`: one pickled task per batch instead of
+      one per image cuts the IPC overhead. Only `2 * workers` batches are in flight at any time.
+    - Each worker opens the image, asks the JPEG decoder for a reduced-size decode (Image.draft), resizes it
+      with Image.thumbnail() and saves it as JPEG. Files that are not images (the three 404 pages in images/)
+      or that fail to decode (a truncated download) are reported per image, the rest of the batch goes on.
+      They get an empty `<name>.jpg.skip` marker, so they are not sent to a worker again until the source changes.
+
+Needs Pillow (pip install Pillow).
+Run it with: python -m concurrency.thumbnails  (reports images/sec for 1 .. cpu_count processes)
+"""
+import concurrent.futures
+import itertools
+import os
+import time
+
+from PIL import Image, UnidentifiedImageError
+
+from concurrency.local_server import IMAGES
+
+EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def iter_images(folder):
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(EXTENSIONS):
+                yield entry.path
+
+
+def thumbnail_path(path, output):
+    return os.path.join(output, f"{os.path.splitext(os.path.basename(path))[0]}.jpg")
+
+
+def skip_path(path, output):
+    return f"{thumbnail_path(path, output)}.skip"
+
+
+def newer(target, path):
+    try:
+        return os.path.getmtime(target) >= os.path.getmtime(path)
+    except FileNotFoundError:
+        return False
+
+
+def is_up_to_date(path, output):
+    return newer(thumbnail_path(path, output), path)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def thumbnail_batch(paths, output, size, quality):
+    # Runs in a worker process: returns (path, "done" / "not an image" / "failed") for every path of the batch
+    results = []
+    for path in paths:
+        target = thumbnail_path(path, output)
+        temporary = f"{target}.{os.getpid()}.tmp"
+        try:
+            with Image.open(path) as image:
+                image.draft("RGB", size)  # JPEG: decode at 1/2, 1/4 or 1/8 scale directly
+                image = image.convert("RGB")
+                image.thumbnail(size)
+                image.save(temporary, "JPEG", quality=quality, optimize=True)
+            os.replace(temporary, target)
+            results.append((path, "done"))
+            continue
+        except UnidentifiedImageError:
+            results.append((path, "not an image"))
+        except OSError:  # truncated or corrupt image data, or the thumbnail couldn't be written
+            results.append((path, "failed"))
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        open(skip_path(path, output), "w").close()
+    return results
+
+
+def make_thumbnails(folder=IMAGES, output="thumbnails", size=(256, 256), workers=None, batch_size=4, quality=85):
+    """
+    Yields (path, status) for every image of `folder`, status is "done", "unchanged", "not an image", "failed"
+    (could not be decoded or saved) or "skipped" (not an image / failed on an earlier run, unchanged since).
+    """
+    os.makedirs(output, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    def pending():
+        for path in iter_images(folder):
+            if is_up_to_date(path, output):
+                unchanged.append((path, "unchanged"))
+            elif newer(skip_path(path, output), path):
+                unchanged.append((path, "skipped"))  # failed before and the source didn't change since
+            else:
+                yield path
+
+    unchanged = []
+    batches = batched(pending(), batch_size)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for batch in itertools.islice(batches, 2 * workers):
+            in_flight.add(executor.submit(thumbnail_batch, batch, output, size, quality))
+        while in_flight:
+            finished, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                yield from future.result()
+                for batch in itertools.islice(batches, 1):
+                    in_flight.add(executor.submit(thumbnail_batch, batch, output, size, quality))
+            while unchanged:
+                yield unchanged.pop()
+    while unchanged:
+        yield unchanged.pop()
+
+
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+    from collections import Counter
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Copy the folder a few times to get a workload worth parallelizing
+        folder = os.path.join(workdir, "images")
+        os.makedirs(folder)
+        for round_ in range(4):
+            for path in iter_images(IMAGES):
+                shutil.copy2(path, os.path.join(folder, f"{round_}-{os.path.basename(path)}"))
+
+        cores = os.cpu_count() or 1
+        for workers in sorted({1, 2, 4, cores} & set(range(1, cores + 1))):
+            output = os.path.join(workdir, f"thumbnails-{workers}")
+            start = time.perf_counter()
+            statuses = Counter(status for _, status in make_thumbnails(folder, output, workers=workers))
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>2} processes: {statuses['done'] / elapsed:6.1f} images/sec  {dict(statuses)}")
+
+        start = time.perf_counter()
+        statuses = Counter(status for _, status in make_thumbnails(folder, output))
+        print(f"Second run:  {time.perf_counter() - start:.2f} seconds  {dict(statuses)}")
+
+
+"""
+Key Points
+
+Processes for CPU-bound work:
+    Every worker process has its own GIL, decoding runs on all cores at once.
+
+Batching:
+    One task carries several images, fewer pickles and fewer round trips between the processes.
+
+Bounded streaming:
+    The file list is consumed lazily and only a few batches wait in the pool, memory stays flat for any folder size.
+
+Incremental builds:
+    A thumbnail newer than its source is skipped before any work is sent to a worker.
+"""
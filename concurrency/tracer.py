@@ -0,0 +1,347 @@
+"""
+Where does the time go? A tracer for threading.Lock, Semaphore and Condition.
+
+The examples in 29. multithreading.py only print "Finished in X seconds". The Tracer wraps the three primitives
+and records, per call site (file:line of the `with lock:` / acquire()):
+
+    - acquisitions, and how many were contended (the lock was taken, the thread had to wait),
+    - total / max wait time (blocked in acquire) and total hold time (acquire -> release),
+    - time spent in Condition.wait().
+
+Every wait and hold is also kept as a timeline event, and export_chrome_trace() writes them in the Chrome trace
+format: open chrome://tracing or https://ui.perfetto.dev, load the file and every thread becomes a row, so a
+serialized section (like the global counter lock) shows up as threads taking turns.
+
+Usage:
+    tracer = Tracer()
+    lock = tracer.Lock("counter")       # or: with tracer.patch(): ... threading.Lock() ...
+    ...
+    print(tracer.report())
+    tracer.export_chrome_trace("trace.json")
+
+Run it with: python -m concurrency.tracer [trace.json]  (traces the counter example of the lesson)
+"""
+import _thread
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from threading import Condition, Semaphore  # the real classes, even while patch() is active
+
+THREADING_FILE = threading.__file__
+
+
+class SiteStats:
+    __slots__ = ("acquisitions", "contended", "wait", "max_wait", "hold", "timeouts")
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait = 0
+        self.max_wait = 0
+        self.hold = 0
+        self.timeouts = 0
+
+
+class Tracer:
+    def __init__(self, max_events=200_000):
+        self.origin = time.perf_counter_ns()
+        self.max_events = max_events  # the timeline is capped, the statistics are not
+        self.events = []
+        self.threads = {}  # ident -> name, remembered while the thread is alive
+        self.stats = {}
+        self.lock = _thread.allocate_lock()  # a raw lock, never traced itself
+
+    # ---- recording ----
+
+    @staticmethod
+    def site():
+        # The first frame outside the tracer and outside threading.py: the code that used the lock
+        frame = sys._getframe(2)
+        while frame is not None and (frame.f_code in INTERNAL or frame.f_code.co_filename == THREADING_FILE):
+            frame = frame.f_back
+        if frame is None:
+            return "?"
+        return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+    def site_stats(self, name, site):
+        key = (name, site)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = SiteStats()
+        return stats
+
+    def event(self, kind, name, site, start, end):
+        if len(self.events) < self.max_events:
+            tid = threading.get_ident()
+            if tid not in self.threads:
+                self.threads[tid] = threading.current_thread().name
+            self.events.append((kind, name, site, tid, start, end))
+
+    def acquired(self, name, site, start, end, contended, ok):
+        wait = end - start
+        with self.lock:
+            stats = self.site_stats(name, site)
+            if ok:
+                stats.acquisitions += 1
+            else:
+                stats.timeouts += 1
+            if contended:
+                stats.contended += 1
+                stats.wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+        if contended:
+            self.event("wait", name, site, start, end)
+
+    def held(self, name, site, start, end):
+        with self.lock:
+            self.site_stats(name, site).hold += end - start
+        self.event("hold", name, site, start, end)
+
+    def waited(self, name, site, start, end):
+        with self.lock:
+            stats = self.site_stats(f"{name}.wait()", site)
+            stats.acquisitions += 1
+            stats.wait += end - start
+            stats.max_wait = max(stats.max_wait, end - start)
+        self.event("condition wait", name, site, start, end)
+
+    # ---- factories ----
+
+    def Lock(self, name=None):
+        return TracedLock(self, name)
+
+    def Semaphore(self, value=1, name=None):
+        return TracedSemaphore(self, value, name)
+
+    def Condition(self, lock=None, name=None):
+        return TracedCondition(self, lock, name)
+
+    @contextmanager
+    def patch(self):
+        # Make threading.Lock() / Semaphore() / Condition() return traced objects while inside the block.
+        # Objects created by threading.py itself (Event, Thread internals) stay untraced.
+        originals = threading.Lock, threading.Semaphore, threading.Condition
+
+        def created_by_threading():
+            return sys._getframe(2).f_code.co_filename == THREADING_FILE
+
+        def lock():
+            return originals[0]() if created_by_threading() else TracedLock(self)
+
+        def semaphore(value=1):
+            return originals[1](value) if created_by_threading() else TracedSemaphore(self, value)
+
+        def condition(lock=None):
+            return originals[2](lock) if created_by_threading() else TracedCondition(self, lock)
+
+        threading.Lock, threading.Semaphore, threading.Condition = lock, semaphore, condition
+        try:
+            yield self
+        finally:
+            threading.Lock, threading.Semaphore, threading.Condition = originals
+
+    # ---- output ----
+
+    def report(self):
+        with self.lock:
+            rows = sorted(self.stats.items(), key=lambda item: item[1].wait, reverse=True)
+        lines = [f"{'primitive':<28} {'call site':<28} {'acquired':>9} {'contended':>9} "
+                 f"{'wait ms':>9} {'max ms':>8} {'hold ms':>9}"]
+        for (name, site), s in rows:
+            lines.append(f"{name:<28} {site:<28} {s.acquisitions:>9} {s.contended:>9} "
+                         f"{s.wait / 1e6:>9.1f} {s.max_wait / 1e6:>8.2f} {s.hold / 1e6:>9.1f}")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        # Complete ("X") events in microseconds, one row per thread
+        pid = os.getpid()
+        trace = []
+        seen = set()
+        for kind, name, site, tid, start, end in list(self.events):
+            if tid not in seen:
+                seen.add(tid)
+                trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                              "args": {"name": self.threads.get(tid, f"thread-{tid}")}})
+            trace.append({"name": f"{kind} {name}", "cat": kind, "ph": "X", "pid": pid, "tid": tid,
+                          "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000,
+                          "args": {"site": site}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(trace)
+
+
+class TracedLock:
+    count = 0
+
+    def __init__(self, tracer, name=None, lock=None):
+        TracedLock.count += 1
+        self.tracer = tracer
+        self.name = name or f"Lock-{TracedLock.count}"
+        self._lock = lock or _thread.allocate_lock()
+        self._owner = None
+        self._hold = None  # (start, site) of the current holder
+
+    def acquire(self, blocking=True, timeout=-1):
+        site = self.tracer.site()
+        start = time.perf_counter_ns()
+        contended = False
+        ok = self._lock.acquire(False)
+        if not ok and blocking:
+            contended = True
+            ok = self._lock.acquire(True, timeout)
+        end = time.perf_counter_ns()
+        self.tracer.acquired(self.name, site, start, end, contended or not ok, ok)
+        if ok:
+            self._owner = threading.get_ident()
+            self._hold = (end, site)
+        return ok
+
+    def release(self):
+        if self._hold is None:
+            raise RuntimeError("release unlocked lock")  # what _thread.lock raises, code may rely on it
+        start, site = self._hold
+        self._owner = None
+        self._hold = None
+        self._lock.release()
+        self.tracer.held(self.name, site, start, time.perf_counter_ns())
+
+    def locked(self):
+        return self._lock.locked()
+
+    def _is_owned(self):
+        # Used by threading.Condition to check that wait()/notify() are called with the lock held
+        return self._owner == threading.get_ident()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __repr__(self):
+        return f"<TracedLock {self.name} {'locked' if self.locked() else 'unlocked'}>"
+
+
+class TracedSemaphore:
+    count = 0
+
+    def __init__(self, tracer, value=1, name=None):
+        TracedSemaphore.count += 1
+        self.tracer = tracer
+        self.name = name or f"Semaphore-{TracedSemaphore.count}"
+        self._semaphore = Semaphore(value)
+        self._holds = threading.local()
+
+    def acquire(self, blocking=True, timeout=None):
+        site = self.tracer.site()
+        start = time.perf_counter_ns()
+        contended = False
+        ok = self._semaphore.acquire(False)
+        if not ok and blocking:
+            contended = True
+            ok = self._semaphore.acquire(True, timeout)
+        end = time.perf_counter_ns()
+        self.tracer.acquired(self.name, site, start, end, contended or not ok, ok)
+        if ok:
+            self._holds.__dict__.setdefault("stack", []).append((end, site))
+        return ok
+
+    def release(self, n=1):
+        stack = self._holds.__dict__.get("stack")
+        self._semaphore.release(n)
+        end = time.perf_counter_ns()
+        # One hold record per released unit; a release from another thread has no hold time to record
+        for _ in range(min(n, len(stack or ()))):
+            start, site = stack.pop()
+            self.tracer.held(self.name, site, start, end)
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class TracedCondition(Condition):
+    def __init__(self, tracer, lock=None, name=None):
+        if lock is None:
+            lock = TracedLock(tracer, name and f"{name}.lock")
+        super().__init__(lock)
+        self.tracer = tracer
+        self.name = name or getattr(lock, "name", "Condition")
+
+    def wait(self, timeout=None):
+        site = self.tracer.site()
+        start = time.perf_counter_ns()
+        try:
+            return super().wait(timeout)
+        finally:
+            self.tracer.waited(self.name, site, start, time.perf_counter_ns())
+
+
+# Frames of the wrappers themselves, skipped when looking for the call site
+INTERNAL = {TracedLock.acquire.__code__, TracedSemaphore.acquire.__code__, TracedCondition.wait.__code__}
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), "counter_trace.json")
+    sys.setswitchinterval(0.0005)
+    tracer = Tracer()
+
+    with tracer.patch():
+        # The lock example of 29. multithreading.py, unchanged (with fewer increments)
+        counter = 0
+        lock = threading.Lock()
+
+        def increment():
+            global counter
+            for _ in range(20_000):
+                with lock:  # Acquire lock
+                    counter += 1  # Safe access
+
+        # And the producer / consumer pair, with a condition
+        items = []
+        condition = threading.Condition()
+
+        def producer():
+            for _ in range(100):
+                with condition:
+                    items.append("item")
+                    condition.notify()
+                time.sleep(0.001)
+
+        def consumer():
+            for _ in range(100):
+                with condition:
+                    while not items:
+                        condition.wait()
+                    items.pop()
+
+        threads = [threading.Thread(target=increment, name=f"increment-{i}") for i in range(4)]
+        threads += [threading.Thread(target=producer, name="producer"), threading.Thread(target=consumer, name="consumer")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    print(counter)  # 80000
+    print(tracer.report())
+    print(f"{tracer.export_chrome_trace(path)} events written to {path} (open it in chrome://tracing or ui.perfetto.dev)")
+
+
+"""
+Key Points
+
+Wait vs hold:
+    Wait time is spent blocked in acquire(), hold time is spent inside the critical section. A lock with a large
+    total wait and a tiny hold is pure contention: threads queue for very short pieces of work.
+
+Call sites:
+    Statistics are grouped by the line that used the primitive, so two `with lock:` blocks on the same lock are separate rows.
+
+Chrome trace:
+    One row per thread on a time axis, serialized sections look like a staircase of holds and waits.
+"""
@@ -0,0 +1,195 @@
+"""
+A long-lived, warm process pool, instead of a new Pool / ProcessPoolExecutor for every batch of work.
+
+Every example in 30. multiprocessing.py opens `with ProcessPoolExecutor() as executor:` (or a Pool) around its
+work. With the "spawn" start method (Windows, macOS) each worker is a fresh interpreter that re-imports the main
+module and everything it uses, so for small jobs most of the measured time is process start-up.
+
+WarmPool keeps one ProcessPoolExecutor around and takes care of it:
+
+    - Lazy start: no process exists until the first submit() (or an explicit warm_up()).
+    - Warm workers: `preload` modules are imported by the initializer of every worker, warm_up() waits until all
+      workers answered, so the first real task doesn't pay for start-up or imports.
+    - Recycling: max_tasks_per_child=N replaces a worker after N tasks (leaky libraries, growing caches).
+    - Health checks: check() looks at the worker processes themselves, not at a ping that would queue behind real
+      work, so a busy pool is healthy. A broken pool (a worker was killed or crashed, BrokenProcessPool) is replaced,
+      and submit() retries once on a fresh pool when the pool broke before the task was sent.
+
+get_pool() returns one shared WarmPool for the whole program, shut down at exit.
+
+Run it with: python -m concurrency.warm_pool  (latency of one square(n) call, cold vs warm)
+"""
+import atexit
+import concurrent.futures
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+
+def warm_worker(preload, initializer, initargs):
+    # Runs once in every new worker process
+    for module in preload:
+        importlib.import_module(module)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def ping(delay=0.0):
+    time.sleep(delay)
+    return os.getpid()
+
+
+class WarmPool:
+    def __init__(self, max_workers=None, preload=(), initializer=None, initargs=(),
+                 max_tasks_per_child=None, start_method=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.preload = tuple(preload)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks_per_child = max_tasks_per_child
+        if start_method is None and max_tasks_per_child:
+            start_method = "spawn"  # recycling workers is not supported with fork
+        self.context = multiprocessing.get_context(start_method)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.restarts = 0
+
+    def pool(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    self.max_workers, mp_context=self.context, initializer=warm_worker,
+                    initargs=(self.preload, self.initializer, self.initargs),
+                    max_tasks_per_child=self.max_tasks_per_child)
+            return self.executor
+
+    def restart(self, broken):
+        # Replace `broken` with a new pool, unless another thread already did. Its pending futures already
+        # fail with BrokenProcessPool, nothing is cancelled here.
+        with self.lock:
+            if self.executor is broken:
+                self.executor = None
+                self.restarts += 1
+        broken.shutdown(wait=False)
+
+    def submit(self, fn, /, *args, **kwargs):
+        executor = self.pool()
+        try:
+            return executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self.restart(executor)
+            return self.pool().submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        return self.pool().map(fn, *iterables, timeout=timeout, chunksize=chunksize)
+
+    def warm_up(self, timeout=60):
+        # Start every worker now and wait until each one ran its initializer
+        futures = [self.submit(ping, 0.05) for _ in range(self.max_workers)]
+        return {future.result(timeout) for future in futures}
+
+    def check(self):
+        # Health check: False (and the pool is replaced) if the pool is broken or a worker died abnormally.
+        # Busy workers are fine; a worker recycled by max_tasks_per_child exits with code 0 and is fine too.
+        # ProcessPoolExecutor keeps both facts in private attributes, there is no public API for them.
+        with self.lock:
+            executor = self.executor
+        if executor is None:
+            return True  # not started yet
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        if not getattr(executor, "_broken", False) and all(p.exitcode in (None, 0) for p in processes):
+            return True
+        self.restart(executor)
+        return False
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_pool(**options):
+    # The program-wide pool, created with `options` on the first call
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WarmPool(**options)
+            atexit.register(_shared.shutdown)
+        return _shared
+
+
+def square(n):
+    # The lesson's square() without the simulated one second of work, so only the overhead is measured
+    return n * n
+
+
+if __name__ == '__main__':
+    import signal
+
+    context = "spawn"
+    runs = 5
+
+    cold = []
+    for n in range(runs):
+        start = time.perf_counter()
+        with concurrent.futures.ProcessPoolExecutor(mp_context=multiprocessing.get_context(context)) as executor:
+            executor.submit(square, n).result()
+        cold.append(time.perf_counter() - start)
+
+    with WarmPool(preload=("json", "decimal"), start_method=context) as pool:
+        start = time.perf_counter()
+        pool.warm_up()
+        warm_up = time.perf_counter() - start
+        warm = []
+        for n in range(runs):
+            start = time.perf_counter()
+            pool.submit(square, n).result()
+            warm.append(time.perf_counter() - start)
+
+        print(f"square(n) with a new pool per call ({context}): {min(cold) * 1000:8.1f} ms")
+        print(f"square(n) on the warm pool:                  {min(warm) * 1000:8.1f} ms  "
+              f"(one-time warm-up {warm_up * 1000:.0f} ms)")
+
+        busy = pool.submit(ping, 1.5)
+        time.sleep(0.2)
+        print("Healthy while a worker is busy:", pool.check(), busy.result() > 0, "restarts:", pool.restarts)
+
+        os.kill(pool.submit(ping).result(), signal.SIGKILL)  # a worker dies
+        time.sleep(0.2)
+        print("Healthy after a worker was killed:", pool.check(), "-> restarted, healthy now:", pool.check(),
+              "restarts:", pool.restarts)
+
+    with WarmPool(max_workers=1, max_tasks_per_child=3) as pool:
+        pids = [pool.submit(ping).result() for _ in range(7)]
+        print("Worker pids with recycling after 3 tasks:", len(set(pids)), "different processes for 7 tasks")
+
+
+"""
+Key Points
+
+Start-up cost:
+    A spawned worker is a new interpreter that imports everything again, that cost is paid once instead of per batch.
+
+Lazy and warm:
+    The pool starts on first use, warm_up() front-loads the start-up before latency matters.
+
+Recycling:
+    max_tasks_per_child replaces workers after N tasks, memory leaks in a task can't accumulate forever.
+
+Health checks:
+    A broken pool (a worker crashed or was killed) is detected and replaced instead of failing every later call.
+"""
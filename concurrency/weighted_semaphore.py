@@ -0,0 +1,261 @@
+"""
+Weighted, fair semaphores for threads and for asyncio.
+
+limited_task() in 29. multithreading.py and download_file() in 28.coroutine_functions.py cap concurrency with a
+plain Semaphore(2): every task costs one slot, and a thread that arrives late may still get the slot first.
+When jobs have different sizes that is a problem: with a greedy "take it if it fits" rule, a heavy job needing
+the whole budget waits forever while light jobs keep slipping in (starvation).
+
+WeightedSemaphore / AsyncWeightedSemaphore:
+    - have a capacity in units, acquire(units) takes several units at once (a heavy job = more units).
+    - admit waiters strictly in order: only the first waiter in line may take units. A light job that arrives
+      after a heavy one waits behind it, so the heavy job gets its units as soon as enough are released.
+    - order the line by FIFO (default) or by priority (lower number first, FIFO between equal priorities).
+    - support timeouts: acquire(..., timeout=...) returns False (threads) / raises TimeoutError (asyncio)
+      and leaves the line without blocking the others.
+
+Run it with: python -m concurrency.weighted_semaphore
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+
+class Waiter:
+    __slots__ = ("key", "units", "wakeup", "cancelled", "admitted")
+
+    def __init__(self, key, units, wakeup):
+        self.key = key
+        self.units = units
+        self.wakeup = wakeup  # a Condition (threads) or a Future (asyncio)
+        self.cancelled = False
+        self.admitted = False
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+class WaitLine:
+    # The admission order shared by both flavors: a heap of waiters with lazy removal
+    def __init__(self, capacity, priority):
+        self.capacity = capacity
+        self.available = capacity
+        self.priority = priority
+        self.heap = []
+        self.order = itertools.count()
+
+    def check(self, units):
+        if not 0 < units <= self.capacity:
+            raise ValueError(f"units must be between 1 and the capacity ({self.capacity})")
+
+    def key(self, priority):
+        return (priority if self.priority else 0, next(self.order))
+
+    def head(self):
+        while self.heap and self.heap[0].cancelled:
+            heapq.heappop(self.heap)
+        return self.heap[0] if self.heap else None
+
+    def admit(self):
+        # Hand units to waiters from the front of the line for as long as they fit
+        admitted = []
+        while (waiter := self.head()) is not None and waiter.units <= self.available:
+            heapq.heappop(self.heap)
+            self.available -= waiter.units
+            waiter.admitted = True
+            admitted.append(waiter)
+        return admitted
+
+
+class WeightedSemaphore:
+    def __init__(self, capacity, priority=False):
+        self.lock = threading.Lock()
+        self.line = WaitLine(capacity, priority)
+
+    @property
+    def available(self):
+        return self.line.available
+
+    def acquire(self, units=1, priority=0, timeout=None):
+        self.line.check(units)
+        with self.lock:
+            if self.line.head() is None and units <= self.line.available:
+                self.line.available -= units  # nobody is waiting: fast path
+                return True
+            waiter = Waiter(self.line.key(priority), units, threading.Condition(self.lock))
+            heapq.heappush(self.line.heap, waiter)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            # release() admits us (takes our units and pops us from the heap) before notifying
+            while not waiter.admitted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    waiter.cancelled = True
+                    self.wake()  # we may have been blocking the line for smaller waiters
+                    return False
+                waiter.wakeup.wait(remaining)
+            return True
+
+    def release(self, units=1):
+        self.line.check(units)
+        with self.lock:
+            if self.line.available + units > self.line.capacity:
+                raise ValueError("released more units than acquired")
+            self.line.available += units
+            self.wake()
+
+    def wake(self):
+        for waiter in self.line.admit():
+            waiter.wakeup.notify()
+
+    @contextmanager
+    def hold(self, units=1, priority=0, timeout=None):
+        if not self.acquire(units, priority, timeout):
+            raise TimeoutError(f"could not acquire {units} units in {timeout} seconds")
+        try:
+            yield
+        finally:
+            self.release(units)
+
+
+class AsyncWeightedSemaphore:
+    def __init__(self, capacity, priority=False):
+        self.line = WaitLine(capacity, priority)
+
+    @property
+    def available(self):
+        return self.line.available
+
+    async def acquire(self, units=1, priority=0, timeout=None):
+        self.line.check(units)
+        if self.line.head() is None and units <= self.line.available:
+            self.line.available -= units
+            return True
+        waiter = Waiter(self.line.key(priority), units, asyncio.get_running_loop().create_future())
+        heapq.heappush(self.line.heap, waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.wakeup), timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if waiter.wakeup.done() and not waiter.wakeup.cancelled():
+                self.release(units)  # admitted at the same moment we gave up: give the units back
+            else:
+                waiter.cancelled = True
+                waiter.wakeup.cancel()
+                self.wake()
+            raise
+
+    def release(self, units=1):
+        self.line.check(units)
+        if self.line.available + units > self.line.capacity:
+            raise ValueError("released more units than acquired")
+        self.line.available += units
+        self.wake()
+
+    def wake(self):
+        for waiter in self.line.admit():
+            if not waiter.wakeup.done():
+                waiter.wakeup.set_result(True)
+
+    @asynccontextmanager
+    async def hold(self, units=1, priority=0, timeout=None):
+        await self.acquire(units, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(units)
+
+
+class GreedySemaphore:
+    # "Take it if it fits" without a line, to show the starvation problem
+    def __init__(self, capacity):
+        self.available = capacity
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def hold(self, units=1, priority=0, timeout=None):
+        with self.condition:
+            while units > self.available:
+                self.condition.wait()
+            self.available -= units
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.available += units
+                self.condition.notify_all()
+
+
+def heavy_job_wait(semaphore, light_threads=6, duration=1.5):
+    # Light jobs (1 unit) keep the semaphore busy; how long does a heavy job (all 4 units) wait?
+    stop = time.monotonic() + duration
+
+    def light():
+        while time.monotonic() < stop:
+            with semaphore.hold(1):
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=light) for _ in range(light_threads)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with semaphore.hold(4):
+        waited = time.monotonic() - start
+    for t in threads:
+        t.join()
+    return waited
+
+
+async def async_demo():
+    semaphore = AsyncWeightedSemaphore(4, priority=True)
+    order = []
+
+    async def job(name, units, priority):
+        async with semaphore.hold(units, priority):
+            order.append(name)
+            await asyncio.sleep(0.05)
+
+    async with semaphore.hold(4):  # fill the budget so everybody queues up
+        tasks = [asyncio.create_task(job(f"{name}({units}u,p{priority})", units, priority))
+                 for name, units, priority in (("backup", 4, 5), ("thumb", 1, 1), ("report", 2, 0), ("thumb", 1, 1))]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    print("asyncio priority admission order:", ", ".join(order))
+
+    try:
+        async with semaphore.hold(4):
+            await semaphore.acquire(1, timeout=0.05)
+    except asyncio.TimeoutError:
+        print("asyncio acquire timed out, available units afterwards:", semaphore.available)
+
+
+if __name__ == '__main__':
+    print(f"Heavy job waited {heavy_job_wait(GreedySemaphore(4)):.2f}s with a greedy semaphore")
+    print(f"Heavy job waited {heavy_job_wait(WeightedSemaphore(4)):.2f}s with the fair WeightedSemaphore")
+
+    semaphore = WeightedSemaphore(2)
+    semaphore.acquire(2)
+    print("Timed out:", not semaphore.acquire(1, timeout=0.05))
+    semaphore.release(2)
+
+    asyncio.run(async_demo())
+
+
+"""
+Key Points
+
+Weights:
+    A job asks for as many units as it costs, the capacity is a budget instead of a number of tasks.
+
+Head-of-line admission:
+    Units are only handed to the first waiter in line, later (smaller) jobs can't overtake it, so nobody starves.
+
+FIFO or priority:
+    The line is a heap ordered by (priority, arrival number), with priority off it is plain FIFO.
+
+Timeouts:
+    A waiter that gives up is marked cancelled, and the line is re-checked because it may have been blocking others.
+"""
@@ -0,0 +1,250 @@
+"""
+A work-stealing thread pool that speaks the concurrent.futures.Executor interface.
+
+ThreadPoolExecutor (29. multithreading.py) keeps every task in one shared queue. WorkStealingExecutor gives every
+worker its own deque instead:
+
+    - submit() from outside the pool spreads tasks round-robin over the worker deques, submit() from inside a task
+      pushes onto the current worker's own deque (children stay close to their parent).
+    - A worker takes from the front of its own deque. When it runs dry it becomes a thief: it visits the other
+      workers starting at a random one and takes from the back of their deques, so owner and thief work on
+      opposite ends and a worker stuck behind a long task does not keep its queued tasks to itself.
+    - A counting semaphore holds one permit per queued task: an idle worker sleeps on it instead of spinning, and
+      a worker that got a permit is guaranteed to find a task somewhere.
+    - join(*futures) lets a task wait for the children it submitted while running queued tasks itself, so
+      fork/join recursion can't deadlock the pool by filling every thread with waiting parents.
+
+submit(), map(), shutdown(wait, cancel_futures=...) and `with` work like any other executor.
+
+Run it with: python -m concurrency.work_stealing  (tail latency with skewed do_something(seconds) durations)
+"""
+import collections
+import concurrent.futures
+import itertools
+import os
+import random
+import threading
+import time
+
+
+class WorkItem:
+    __slots__ = ("future", "fn", "args", "kwargs")
+
+    def __init__(self, future, fn, args, kwargs):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as exc:
+            self.future.set_exception(exc)
+        else:
+            self.future.set_result(result)
+
+
+class WorkStealingExecutor(concurrent.futures.Executor):
+    def __init__(self, max_workers=None, thread_name_prefix="stealer"):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        if self.max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self.deques = [collections.deque() for _ in range(self.max_workers)]
+        self.permits = threading.Semaphore(0)  # one per queued task (plus one per worker at shutdown)
+        self.local = threading.local()
+        self.next_deque = itertools.count()
+        self.shutdown_lock = threading.Lock()
+        self.closed = False
+        self.steals = [0] * self.max_workers
+        self.threads = []
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self.worker, args=(index,), name=f"{thread_name_prefix}-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    # ---- Executor interface ----
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self.shutdown_lock:
+            if self.closed:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = concurrent.futures.Future()
+            index = getattr(self.local, "index", None)
+            if index is None:
+                index = next(self.next_deque) % self.max_workers
+            self.deques[index].append(WorkItem(future, fn, args, kwargs))
+        self.permits.release()
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self.shutdown_lock:
+            if self.closed:
+                return
+            self.closed = True
+            if cancel_futures:
+                for tasks in self.deques:
+                    while tasks:
+                        try:
+                            tasks.popleft().future.cancel()
+                        except IndexError:
+                            break
+        self.permits.release(self.max_workers)  # wakes every worker so it can notice the shutdown
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+    # ---- workers ----
+
+    def find(self, index):
+        # Own deque first (front), then the others from a random starting point (back)
+        try:
+            return self.deques[index].popleft()
+        except IndexError:
+            pass
+        start = random.randrange(self.max_workers)
+        for offset in range(self.max_workers):
+            victim = (start + offset) % self.max_workers
+            if victim == index:
+                continue
+            try:
+                item = self.deques[victim].pop()
+            except IndexError:
+                continue
+            self.steals[index] += 1
+            return item
+        return None
+
+    def worker(self, index):
+        self.local.index = index
+        while True:
+            self.permits.acquire()
+            while (item := self.find(index)) is None:
+                if self.closed:
+                    return  # a shutdown permit and nothing left to run
+                time.sleep(0)  # another worker holds the task our permit stands for, look again
+            item.run()
+            del item
+
+    def join(self, *futures):
+        # Wait for `futures`; on a worker thread, run queued tasks meanwhile instead of blocking the thread
+        index = getattr(self.local, "index", None)
+        pending = [future for future in futures if not future.done()]
+        while index is not None and pending:
+            if self.permits.acquire(blocking=False):
+                item = self.find(index)
+                if item is None:
+                    self.permits.release()
+                else:
+                    item.run()
+                    del item
+                    pending = [future for future in pending if not future.done()]
+                    continue
+            concurrent.futures.wait(pending, timeout=0.001, return_when=concurrent.futures.FIRST_COMPLETED)
+            pending = [future for future in pending if not future.done()]
+        return [future.result() for future in futures]
+
+
+class StaticPartitionExecutor(concurrent.futures.Executor):
+    # The baseline without stealing: tasks are dealt round-robin once and stay on their worker
+    def __init__(self, max_workers):
+        self.queues = [collections.deque() for _ in range(max_workers)]
+        self.next_queue = itertools.count()
+        self.max_workers = max_workers
+        self.threads = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = concurrent.futures.Future()
+        self.queues[next(self.next_queue) % self.max_workers].append(WorkItem(future, fn, args, kwargs))
+        return future
+
+    def start(self):
+        def worker(tasks):
+            while tasks:
+                tasks.popleft().run()
+
+        self.threads = [threading.Thread(target=worker, args=(tasks,)) for tasks in self.queues]
+        for thread in self.threads:
+            thread.start()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        for thread in self.threads:
+            thread.join()
+
+
+def do_something(seconds):
+    time.sleep(seconds)
+    return f"Done sleeping for {seconds}."
+
+
+def skewed_durations(count, seed=1):
+    # About 90% short tasks (5 ms) and 10% long ones (50 .. 300 ms). The first tenth of the batch is sorted longest
+    # first, so its long tasks are clustered at the start, the rest stay scattered; the mix itself doesn't change.
+    rng = random.Random(seed)
+    durations = [rng.uniform(0.05, 0.3) if rng.random() < 0.1 else 0.005 for _ in range(count)]
+    head = count // 10
+    durations[:head] = sorted(durations[:head], reverse=True)
+    return durations
+
+
+def latencies(executor, durations, start_late=False):
+    done = [0.0] * len(durations)
+
+    def task(i, seconds):
+        do_something(seconds)
+        done[i] = time.perf_counter()
+
+    start = time.perf_counter()
+    futures = [executor.submit(task, i, seconds) for i, seconds in enumerate(durations)]
+    if start_late:
+        executor.start()
+    concurrent.futures.wait(futures)
+    executor.shutdown()
+    return sorted(finish - start for finish in done)
+
+
+def fib(executor, n):
+    # Fork/join recursion: every call submits its two children and joins them
+    if n < 12:
+        return n if n < 2 else fib(executor, n - 1) + fib(executor, n - 2)
+    left = executor.submit(fib, executor, n - 1)
+    right = executor.submit(fib, executor, n - 2)
+    return sum(executor.join(left, right))
+
+
+if __name__ == '__main__':
+    workers = 8
+    durations = skewed_durations(400)
+    print(f"{len(durations)} tasks, {sum(durations):.1f}s of sleeping, {workers} workers "
+          f"(ideal makespan {sum(durations) / workers:.2f}s)")
+    for name, make, start_late in (("ThreadPoolExecutor", lambda: concurrent.futures.ThreadPoolExecutor(workers), False),
+                                   ("static partition", lambda: StaticPartitionExecutor(workers), True),
+                                   ("work stealing", lambda: WorkStealingExecutor(workers), False)):
+        times = latencies(make(), durations, start_late)
+        p = lambda q: times[min(len(times) - 1, int(q * len(times)))]
+        print(f"{name:<20} p50 {p(.5):.2f}s  p90 {p(.9):.2f}s  p99 {p(.99):.2f}s  makespan {times[-1]:.2f}s")
+
+    with WorkStealingExecutor(4) as executor:
+        start = time.perf_counter()
+        print("fib(22) =", executor.submit(fib, executor, 22).result(),
+              f"in {time.perf_counter() - start:.2f}s with 4 workers, steals per worker: {executor.steals}")
+
+
+"""
+Key Points
+
+Per-worker deques:
+    Each worker has its own queue, the owner takes from the front and thieves take from the back.
+
+Random stealing:
+    An idle worker picks a random victim to start from, so thieves spread out instead of all hitting worker 0.
+
+Tail latency:
+    With a fixed assignment, tasks queued behind a long task wait for it even when other workers are idle.
+    Stealing moves them to the idle workers, the slowest tasks finish close to the ideal makespan.
+
+Helping while waiting:
+    join() runs queued tasks on the waiting thread, parents waiting for children never use up the pool.
+"""
@@ -17,13 +17,13 @@ def print_summary(game, player_stats):
 
     print(summary)
 
-def rps_winner(stats, player_choice, computer_choice):
+winning_situations = {
+    "Rock": "Scissors",
+    "Paper": "Rock",
+    "Scissors": "Paper"
+}
 
-    winning_situations = {
-        "Rock": "Scissors",
-        "Paper": "Rock",
-        "Scissors": "Paper"
-    }
+def rps_winner(stats, player_choice, computer_choice):
 
     if player_choice == computer_choice:
         print('it\'s a Tie')
@@ -1,7 +1,16 @@
-import random
 from functions import *
+from strategy import FrequencyStrategy
 
-def play_guess_number(player_name, stats):
+def guess_number_opponent():
+    # The computer learns the player's favourite numbers and avoids them
+    return FrequencyStrategy(range(1, 6), order=2)
+
+
+def play_guess_number(player_name, stats, opponent=None):
+
+    # Pass the same opponent on every visit, so what it learned about the player isn't lost
+    if opponent is None:
+        opponent = guess_number_opponent()
 
     def start_game():
 
@@ -18,7 +27,8 @@ def play_guess_number(player_name, stats):
                 continue
 
             stats["playing_times"] += 1
-            computer_guess = random.randint(1, 5)
+            computer_guess = opponent.next_move()
+            opponent.record(player_guess)
 
             guess_number_winner(stats, player_guess, computer_guess)
 
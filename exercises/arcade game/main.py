@@ -1,7 +1,7 @@
 import argparse
 import sys
-from rps import play_rps
-from guess_number import play_guess_number
+from rps import play_rps, rps_opponent
+from guess_number import play_guess_number, guess_number_opponent
 from functions import *
 
 class CustomArgparser(argparse.ArgumentParser):
@@ -11,6 +11,10 @@ class CustomArgparser(argparse.ArgumentParser):
 
 def define_game(player_name, rps_stats, guess_stats):
 
+    # One opponent per game for the whole arcade session, like the stats
+    rps_computer = rps_opponent()
+    guess_computer = guess_number_opponent()
+
     def start_playing():
 
         nonlocal player_name
@@ -28,10 +32,10 @@ def define_game(player_name, rps_stats, guess_stats):
                 sys.exit(f"By {player_name}")
 
             if int(player_choice) == 1:
-                start_game = play_rps(player_name, rps_stats)
+                start_game = play_rps(player_name, rps_stats, rps_computer)
                 rps_stats = start_game()
             elif int(player_choice) == 2:
-                start_game = play_guess_number(player_name, guess_stats)
+                start_game = play_guess_number(player_name, guess_stats, guess_computer)
                 guess_stats = start_game()
 
     return start_playing
@@ -1,9 +1,18 @@
-import random
 from functions import *
+from strategy import FrequencyStrategy
 
-def play_rps(player_name, stats):
+def rps_opponent():
+    # The computer predicts the player's next choice from the previous ones and plays what beats it
+    return FrequencyStrategy(["Rock", "Paper", "Scissors"], order=2, beats=winning_situations)
+
+
+def play_rps(player_name, stats, opponent=None):
 
     choices = ["Rock", "Paper", "Scissors"]
+
+    # Pass the same opponent on every visit, so what it learned about the player isn't lost
+    if opponent is None:
+        opponent = rps_opponent()
            
     def start_game():
 
@@ -16,7 +25,8 @@ def play_rps(player_name, stats):
                 continue
 
             stats["playing_times"] += 1
-            computer_choice = random.choice(choices)
+            computer_choice = opponent.next_move()
+            opponent.record(player_choice)
 
             print(f"{player_name}, You chose {player_choice} while computer chose {computer_choice}")
 
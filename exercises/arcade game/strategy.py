@@ -0,0 +1,188 @@
+"""
+Adaptive computer opponent for the arcade games.
+
+Instead of drawing every computer move with random.randint / random.choice, the
+opponent remembers what the player did before and plays against it:
+
+    - Every move is turned into an index (0 .. k-1) so it can live in an array.
+    - The last `order` player moves form a "context" (an n-gram), packed into one
+      integer: context = (context * k + move) % k**order. Updating it is O(1).
+    - For every context we keep a row of k counters in one flat array('L'), plus
+      the index of the move seen most often in that context. When a counter grows
+      we only compare it against the current best, so the update stays O(1).
+    - Prediction = the best move of the current context (or the overall most
+      frequent move when the context was never seen). The counter-move is looked
+      up in a precomputed table, so picking a move is O(1) as well.
+
+Memory never grows while playing: the arrays are sized once (k**order * k counters).
+"""
+import random
+import time
+from array import array
+
+
+class FrequencyStrategy:
+    def __init__(self, moves, order=2, beats=None):
+        # moves: the possible player/computer moves, e.g. range(1, 6) or ["Rock", "Paper", "Scissors"]
+        # order: how many previous player moves are used as context (the n of the n-gram)
+        # beats: {move: move_it_beats}. When given, the computer plays the move that beats
+        #        the prediction (Rock-Paper-Scissors). Without it the computer avoids the
+        #        predicted move (Guess the Number: the player must not guess our number).
+        self.moves = list(moves)
+        self.index = {move: i for i, move in enumerate(self.moves)}
+        k = len(self.moves)
+        if not 2 <= k <= 255:
+            raise ValueError("A strategy needs between 2 and 255 moves")
+
+        self.k = k
+        self.order = order
+        self.contexts = k ** order
+
+        self.counts = array('L', bytes(array('L').itemsize * self.contexts * k))  # n-gram counters
+        self.best = array('B', bytes(self.contexts))  # most frequent next move per context
+        self.seen = array('B', bytes(self.contexts))  # 1 once a context has any data
+        self.totals = array('L', bytes(array('L').itemsize * k))  # plain move frequencies
+        self.most_frequent = 0
+        self.context = 0
+        self.history = 0  # number of recorded moves, the context is only valid after `order` of them
+
+        if beats is None:
+            self.counter = None
+        else:
+            # counter[p] = the move that beats predicted move p
+            self.counter = array('B', bytes(k))
+            for winner, loser in beats.items():
+                self.counter[self.index[loser]] = self.index[winner]
+
+    def predict(self):
+        # Index of the move the player is expected to make next
+        if self.history >= self.order and self.seen[self.context]:
+            return self.best[self.context]
+        return self.most_frequent
+
+    def next_index(self):
+        predicted = self.predict()
+        if self.counter is not None:
+            return self.counter[predicted]
+        # Any move except the predicted one, chosen uniformly
+        return (predicted + 1 + random.randrange(self.k - 1)) % self.k
+
+    def next_move(self):
+        return self.moves[self.next_index()]
+
+    def record_index(self, move):
+        k = self.k
+
+        total = self.totals[move] + 1
+        self.totals[move] = total
+        if total > self.totals[self.most_frequent]:
+            self.most_frequent = move
+
+        if self.history >= self.order:
+            context = self.context
+            row = context * k
+            count = self.counts[row + move] + 1
+            self.counts[row + move] = count
+            if count > self.counts[row + self.best[context]]:
+                self.best[context] = move
+            self.seen[context] = 1
+        else:
+            self.history += 1
+
+        self.context = (self.context * k + move) % self.contexts
+
+    def record(self, player_move):
+        self.record_index(self.index[player_move])
+
+    def simulate(self, player_moves):
+        """
+        Batch mode: play many rounds against a sequence of player move indices.
+        Returns how many rounds the computer won (it predicted the player correctly).
+        The loop keeps everything in local variables, it is the hot path of the benchmark.
+        """
+        k = self.k
+        contexts = self.contexts
+        order = self.order
+        counts = self.counts
+        best = self.best
+        seen = self.seen
+        totals = self.totals
+        most_frequent = self.most_frequent
+        context = self.context
+        history = self.history
+
+        wins = 0
+        for move in player_moves:
+            # 1) predict
+            if history >= order and seen[context]:
+                predicted = best[context]
+            else:
+                predicted = most_frequent
+            if predicted == move:
+                wins += 1
+
+            # 2) learn
+            total = totals[move] + 1
+            totals[move] = total
+            if total > totals[most_frequent]:
+                most_frequent = move
+            if history >= order:
+                row = context * k
+                count = counts[row + move] + 1
+                counts[row + move] = count
+                if count > counts[row + best[context]]:
+                    best[context] = move
+                seen[context] = 1
+            else:
+                history += 1
+            context = (context * k + move) % contexts
+
+        self.most_frequent = most_frequent
+        self.context = context
+        self.history = history
+        # With a `beats` table, predicting right means the counter-move wins the round.
+        # Without it, predicting right means the player missed our number.
+        return wins
+
+
+if __name__ == '__main__':
+
+    rounds = 1_000_000
+    k = 5
+
+    # A few kinds of players: purely random, biased towards one number, and cycling through a pattern
+    players = {
+        "random": [random.randrange(k) for _ in range(rounds)],
+        "biased": random.choices(range(k), weights=[6, 1, 1, 1, 1], k=rounds),
+        "pattern": [(0, 2, 4, 1)[i % 4] for i in range(rounds)],
+    }
+
+    for name, player_moves in players.items():
+        for order in (0, 1, 2, 3):
+            strategy = FrequencyStrategy(range(1, k + 1), order=order)
+            start = time.perf_counter()
+            wins = strategy.simulate(player_moves)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>8} player | order {order} | predicted {wins / rounds:6.1%} "
+                  f"| {rounds / elapsed / 1e6:5.2f}M rounds/sec")
+
+    # Baseline: the old random.randint opponent only "predicts" right 1 time in k
+    start = time.perf_counter()
+    hits = sum(1 for move in players["pattern"] if random.randrange(k) == move)
+    elapsed = time.perf_counter() - start
+    print(f" pattern player | randint  | predicted {hits / rounds:6.1%} "
+          f"| {rounds / elapsed / 1e6:5.2f}M rounds/sec")
+
+
+"""
+Key Points
+
+Fixed-size state:
+    All counters live in typed arrays created once, the opponent never allocates while playing.
+
+O(1) per round:
+    Predicting reads one array slot, learning updates one counter and compares it with the current best.
+
+Batch mode:
+    simulate() runs the same algorithm over a whole list of moves with every attribute bound to a local variable.
+"""
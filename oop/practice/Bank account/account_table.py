@@ -0,0 +1,213 @@
+"""
+Columnar storage for a huge number of accounts.
+
+Every BankAccount / InterestRewards / AddFees instance is a full Python object with its own __dict__,
+so millions of accounts cost gigabytes. AccountTable stores the same data column by column:
+
+    names     -> one list of strings
+    balances  -> array('d'), 8 bytes per account (or array('q') of exact integer cents with AccountTable(cents=True))
+    kinds     -> array('B'), 1 byte per account (which class the account behaves like)
+
+table[i] hands out an AccountRef: a tiny __slots__ object (table + row number) with the same methods as
+BankAccount, so existing code keeps working. Interest and fees for the whole table are applied in one pass
+over the columns instead of one method call per account.
+"""
+import os
+import time
+import tracemalloc
+from array import array
+from contextlib import redirect_stdout
+
+from Bank_account import BankAccount, InterestRewards, AddFees, BalanceException
+
+BANK_ACCOUNT = 0
+INTEREST_REWARDS = 1
+ADD_FEES = 2
+
+KINDS = {BankAccount: BANK_ACCOUNT, InterestRewards: INTEREST_REWARDS, AddFees: ADD_FEES}
+
+INTEREST = .01  # InterestRewards adds 1% on every deposit
+FEES = 5  # AddFees charges $5 on every withdrawal
+
+
+class AccountTable:
+    def __init__(self, cents=False):
+        # cents=True keeps the balances as integer cents (array('q')), AccountRef still reads and writes dollars
+        self.cents = cents
+        self.names = []
+        self.balances = array('q' if cents else 'd')
+        self.kinds = array('B')
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("account index out of range")
+        return AccountRef(self, index % len(self))
+
+    def add(self, name, balance, kind=BankAccount):
+        # kind is one of the account classes, or its flag
+        self.names.append(name)
+        self.balances.append(round(balance * 100) if self.cents else balance)
+        self.kinds.append(KINDS.get(kind, kind))
+        return AccountRef(self, len(self.names) - 1)
+
+    def apply_interest(self, rate=INTEREST):
+        # Credit `rate` of the balance to every InterestRewards / AddFees account, in place in one pass
+        balances = self.balances
+        if self.cents:
+            for i, kind in enumerate(self.kinds):
+                if kind:
+                    balances[i] += round(balances[i] * rate)  # to the cent, half-to-even
+            return
+        growth = 1 + rate
+        for i, kind in enumerate(self.kinds):
+            if kind:
+                balances[i] *= growth
+
+    def apply_fees(self, fees=FEES):
+        # Charge the AddFees accounts a fixed fee, in place in one pass
+        balances = self.balances
+        if self.cents:
+            fees = round(fees * 100)
+        for i, kind in enumerate(self.kinds):
+            if kind == ADD_FEES:
+                balances[i] -= fees
+
+    def total(self):
+        total = sum(self.balances)
+        return total / 100 if self.cents else total
+
+
+class AccountRef:
+    # Lightweight handle to one row of an AccountTable, with the BankAccount methods
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, AccountRef) and (self.table, self.index) == (other.table, other.index)
+
+    def __hash__(self):
+        return hash((id(self.table), self.index))
+
+    def __repr__(self):
+        return f"AccountRef(name={self.name!r}, balance={self.balance:.2f})"
+
+    @property
+    def name(self):
+        return self.table.names[self.index]
+
+    @property
+    def balance(self):
+        balance = self.table.balances[self.index]
+        return balance / 100 if self.table.cents else balance
+
+    @balance.setter
+    def balance(self, value):
+        self.table.balances[self.index] = round(value * 100) if self.table.cents else value
+
+    @property
+    def kind(self):
+        return self.table.kinds[self.index]
+
+    @property
+    def fees(self):
+        if self.kind != ADD_FEES:
+            raise AttributeError("only AddFees accounts have fees")
+        return FEES
+
+    def getBalance(self):
+        print(f"Account {self.name} has balance of ${self.balance:.2f}")
+
+    def viableTransaction(self, amount):
+        if self.balance < amount:
+            raise BalanceException(f"Insuffient balance, current balance: ${self.balance:.2f}")
+
+    def withdraw(self, amount):
+        try:
+            self.viableTransaction(amount)
+            if self.kind == ADD_FEES:
+                self.balance -= (amount + FEES)
+                print(f"Account {self.name} has withdrawn ${amount:.2f} and ${FEES:.2f} as fees. Remaining balance is ${self.balance:.2f}")
+            else:
+                self.balance -= amount
+                print(f"Account {self.name} has withdrawn ${amount:.2f}. Remaining balance is ${self.balance:.2f}")
+        except BalanceException as e:
+            print(str(e))
+
+    def deposit(self, amount):
+        if self.kind == BANK_ACCOUNT:
+            self.balance += amount
+        else:
+            self.balance += amount + (amount * INTEREST)
+        print(f"Account {self.name} has deposited ${amount:.2f}. New balance is ${self.balance:.2f}")
+
+    def transfer(self, account, amount):
+        # Like BankAccount.transfer: the target's own deposit rules apply (interest included)
+        try:
+            self.viableTransaction(amount)
+            print("**** Transfer Start ****")
+            self.balance -= amount
+            print(f"Account {self.name} has withdrawn ${amount:.2f}. Remaining balance is ${self.balance:.2f}")
+            account.deposit(amount)
+            print(f"Transfer successful from account {self.name} to account {account.name} with amount ${amount:.2f}")
+            print("**** Transfer End ****")
+        except BalanceException as e:
+            print(str(e))
+
+
+if __name__ == '__main__':
+
+    count = 200_000
+    classes = (BankAccount, InterestRewards, AddFees)
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        tracemalloc.start()
+        objects = [classes[i % 3](f"user{i}", 100.0) for i in range(count)]
+        object_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        table = AccountTable()
+        for i in range(count):
+            table.add(f"user{i}", 100.0, classes[i % 3])
+        table_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # Month end: one deposit of interest per account vs one pass over the table
+        start = time.perf_counter()
+        for account in objects:
+            if isinstance(account, InterestRewards):
+                account.balance *= 1 + INTEREST
+            if isinstance(account, AddFees):
+                account.balance -= FEES
+        per_object = time.perf_counter() - start
+
+        start = time.perf_counter()
+        table.apply_interest()
+        table.apply_fees()
+        columnar = time.perf_counter() - start
+
+    print(f"{count:,} accounts as objects: {object_memory / 2**20:7.1f} MiB")
+    print(f"{count:,} accounts in a table: {table_memory / 2**20:7.1f} MiB")
+    print(f"Month end per object: {per_object * 1000:7.1f} ms, per table: {columnar * 1000:7.1f} ms")
+    print(f"Totals match: {abs(sum(a.balance for a in objects) - table.total()) < 1e-6}")
+    print(table[2])
+
+
+"""
+Key Points
+
+Structure of arrays:
+    One typed array per attribute instead of one object per account, a balance costs 8 bytes instead of a whole __dict__.
+
+__slots__ proxies:
+    AccountRef only stores the table and a row number, it is created on demand and keeps the BankAccount methods.
+
+Whole-table operations:
+    apply_interest() and apply_fees() update the balance column in place in a single pass, no temporary list or array.
+"""
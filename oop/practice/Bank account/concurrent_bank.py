@@ -0,0 +1,160 @@
+"""
+Thread-safe transfers for the practice bank.
+
+BankAccount.transfer() reads and writes two balances without any synchronization, so two threads moving
+money between the same accounts can lose updates. One global lock (like the counter example in
+29. multithreading.py) fixes that but lets only one transfer run at a time.
+
+Lock striping sits in between:
+    - There is a fixed pool of locks (the stripes), an account uses stripe number  id % len(stripes).
+    - deposit / withdraw take the stripe of their account.
+    - transfer takes the stripes of both accounts in one global order, (id of the LockStripes, stripe number),
+      so two opposite transfers can never wait on each other (no deadlock), also when the two accounts use
+      different LockStripes instances. With one LockStripes and ids below the stripe count this is exactly
+      "lower account id first".
+
+Transfers between unrelated accounts use different stripes and run at the same time. With the GIL that only
+pays off while the thread holding a stripe is waiting (I/O, a database, a sleep): a pure-Python critical section
+runs one thread at a time anyway, and then two lock acquisitions per transfer are simply slower than one global
+lock. The stress run therefore uses YieldingBalance, a balance whose read-modify-write lets other threads run in
+between, like a balance stored in a database would. That shows both the lost updates of the unsafe class and
+the stripes running transfers side by side.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+from Bank_account import BankAccount
+
+
+class LockStripes:
+    def __init__(self, count=64):
+        # RLock, because transfer() calls deposit() on the target while holding its stripe
+        self.locks = [threading.RLock() for _ in range(count)]
+
+    def __len__(self):
+        return len(self.locks)
+
+    def stripe(self, account_id):
+        return account_id % len(self.locks)
+
+    def lock_for(self, account_id):
+        return self.locks[self.stripe(account_id)]
+
+    def key(self, account_id):
+        # Position of the account's lock in the global lock order, over all LockStripes instances
+        return id(self), self.stripe(account_id)
+
+
+class SafeBankAccount(BankAccount):
+    ids = itertools.count()
+    stripes = LockStripes()
+
+    def __init__(self, name, balance, stripes=None):
+        super().__init__(name, balance)
+        self.id = next(SafeBankAccount.ids)
+        if stripes is not None:
+            self.stripes = stripes
+
+    def withdraw(self, amount):
+        with self.stripes.lock_for(self.id):
+            super().withdraw(amount)
+
+    def deposit(self, amount):
+        with self.stripes.lock_for(self.id):
+            super().deposit(amount)
+
+    def transfer(self, account, amount):
+        # The target's lock comes from the target's stripes, which may be another LockStripes instance
+        locks = {self.stripes.key(self.id): self.stripes.lock_for(self.id),
+                 account.stripes.key(account.id): account.stripes.lock_for(account.id)}
+        locks = [locks[key] for key in sorted(locks)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            super().transfer(account, amount)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+class GlobalLockBankAccount(BankAccount):
+    # The "one lock for everything" version, for comparison
+    lock = threading.RLock()
+
+    def transfer(self, account, amount):
+        with self.lock:
+            super().transfer(account, amount)
+
+
+class YieldingBalance(BankAccount):
+    # Reading the balance gives up the GIL (time.sleep(0)), so `balance -= amount` is a read, a thread switch
+    # and a write: the race that is only rare with a plain attribute happens all the time.
+    @property
+    def balance(self):
+        balance = self._balance
+        time.sleep(0)
+        return balance
+
+    @balance.setter
+    def balance(self, value):
+        self._balance = value
+
+
+def stress(accounts, threads=8, transfers=10_000):
+    # Every thread moves random amounts between random pairs of accounts
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(transfers):
+            source, target = rng.sample(accounts, 2)
+            source.transfer(target, rng.randint(1, 50))
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+
+    sys.setswitchinterval(1e-6)  # switch threads very often to make races show up
+
+    for threads in (1, 2, 4, 8, 16):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            results = {}
+            for cls in (BankAccount, GlobalLockBankAccount, SafeBankAccount):
+                bases = (YieldingBalance,) if cls is BankAccount else (cls, YieldingBalance)
+                yielding = type(cls.__name__, bases, {})
+                accounts = [yielding(f"user{i}", 1000) for i in range(32)]
+                before = sum(account.balance for account in accounts)
+                elapsed = stress(accounts, threads, transfers=2_000)
+                after = sum(account.balance for account in accounts)
+                results[cls.__name__] = (elapsed, before == after)
+
+        for name, (elapsed, conserved) in results.items():
+            print(f"{threads:>2} threads | {name:<21} | {threads * 2_000 / elapsed:9,.0f} transfers/sec "
+                  f"| total conserved: {conserved}")
+
+
+"""
+Key Points
+
+Lock striping:
+    A fixed number of locks shared by all accounts, less contention than one global lock, less memory than one lock per account.
+
+Deadlock-free ordering:
+    Locks are always acquired in the same (stripes instance, stripe) order, so no two threads can hold each other's next lock.
+
+Striping and the GIL:
+    More locks only help when lock holders wait outside the interpreter, otherwise one global lock is cheaper.
+
+Conservation check:
+    Transfers only move money, so the sum of all balances must be the same before and after the stress run.
+"""
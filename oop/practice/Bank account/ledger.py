@@ -0,0 +1,234 @@
+"""
+Ledger mode for the bank accounts.
+
+BankAccount changes self.balance and prints a line on every deposit / withdraw / transfer,
+so the console decides how fast the bank can go. In ledger mode:
+
+    - Accounts are rows in the ledger (an index into typed arrays) instead of separate objects.
+    - Every accepted transaction is appended to an in-memory journal made of parallel arrays
+      (kind, source account, target account, amount). The journal is append-only.
+    - apply_batch(transactions) validates a whole batch, then commits thousands of transactions in one call.
+    - Logging is optional and asynchronous: the ledger only hands the journal range of a
+      committed batch to a background thread, which formats and prints the messages.
+"""
+import math
+import numbers
+import os
+import queue
+import sys
+import threading
+import time
+from array import array
+from contextlib import redirect_stdout
+
+from Bank_account import BankAccount, BalanceException
+
+DEPOSIT = 0
+WITHDRAW = 1
+TRANSFER = 2
+
+NO_ACCOUNT = -1  # target of deposits / withdrawals
+
+
+class JournalPrinter(threading.Thread):
+    # Prints journal entries in the background so committing never waits for the console
+    def __init__(self, ledger, stream=None):
+        super().__init__(daemon=True)
+        self.ledger = ledger
+        self.stream = stream
+        self.pending = queue.SimpleQueue()
+
+    def submit(self, start, end):
+        self.pending.put((start, end))
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            lines = [self.ledger.describe(i) for i in range(*item)]
+            print("\n".join(lines), file=self.stream or sys.stdout)
+
+    def close(self):
+        self.pending.put(None)
+        self.join()
+
+
+class Ledger:
+    def __init__(self, log=False, stream=None):
+        self.names = []
+        self.balances = array('d')
+
+        # The journal: one entry per committed transaction
+        self.kinds = array('B')
+        self.sources = array('l')
+        self.targets = array('l')
+        self.amounts = array('d')
+
+        self.printer = None
+        if log:
+            self.printer = JournalPrinter(self, stream)
+            self.printer.start()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def open_account(self, name, balance=0):
+        self.names.append(name)
+        self.balances.append(balance)
+        return len(self.names) - 1
+
+    def getBalance(self, account):
+        return self.balances[account]
+
+    def apply_batch(self, transactions):
+        """
+        Commits an iterable of (kind, source, target, amount) tuples.
+        The whole batch is validated first (kinds, account indexes, amounts that are positive finite numbers,
+        transfers between two different accounts): a malformed transaction raises ValueError before any
+        balance or journal entry changes. Then each transaction is checked against the running balances like
+        viableTransaction() does; the ones without enough balance are skipped.
+        Returns the positions of the rejected ones.
+        """
+        transactions = list(transactions)
+        accounts = len(self.balances)
+        for position, (kind, source, target, amount) in enumerate(transactions):
+            if kind not in (DEPOSIT, WITHDRAW, TRANSFER):
+                raise ValueError(f"Unknown transaction kind {kind} at position {position}")
+            if not 0 <= source < accounts:
+                raise ValueError(f"Unknown source account {source} at position {position}")
+            if kind == TRANSFER and not 0 <= target < accounts:
+                raise ValueError(f"Unknown target account {target} at position {position}")
+            if kind == TRANSFER and target == source:
+                raise ValueError(f"Transfer from account {source} to itself at position {position}")
+            if not isinstance(amount, numbers.Real) or isinstance(amount, bool) or not math.isfinite(amount) \
+                    or amount <= 0:
+                raise ValueError(f"Invalid amount {amount!r} at position {position}, expected a positive number")
+
+        balances = self.balances
+        kinds = self.kinds
+        sources = self.sources
+        targets = self.targets
+        amounts = self.amounts
+        start = len(kinds)
+        rejected = []
+
+        for position, (kind, source, target, amount) in enumerate(transactions):
+            if kind == DEPOSIT:
+                balances[source] += amount
+            else:
+                if balances[source] < amount:
+                    rejected.append(position)
+                    continue
+                balances[source] -= amount
+                if kind == TRANSFER:
+                    balances[target] += amount
+
+            kinds.append(kind)
+            sources.append(source)
+            targets.append(target)
+            amounts.append(amount)
+
+        if self.printer is not None and len(kinds) > start:
+            self.printer.submit(start, len(kinds))
+        return rejected
+
+    def describe(self, entry):
+        # Same wording as the BankAccount messages, produced from the journal
+        kind = self.kinds[entry]
+        name = self.names[self.sources[entry]]
+        amount = self.amounts[entry]
+        if kind == DEPOSIT:
+            return f"Account {name} has deposited ${amount:.2f}."
+        if kind == WITHDRAW:
+            return f"Account {name} has withdrawn ${amount:.2f}."
+        return f"Transfer successful from account {name} to account {self.names[self.targets[entry]]} with amount ${amount:.2f}"
+
+    def close(self):
+        if self.printer is not None:
+            self.printer.close()
+            self.printer = None
+
+
+class LedgerAccount(BankAccount):
+    # The BankAccount methods, but every operation goes through the ledger without printing: withdraw() and
+    # transfer() raise BalanceException instead of printing it, and an invalid amount raises ValueError
+    def __init__(self, ledger, name, balance):
+        self.ledger = ledger
+        self.name = name
+        self.index = ledger.open_account(name, balance)
+
+    @property
+    def balance(self):
+        return self.ledger.balances[self.index]
+
+    def getBalance(self):
+        return self.balance
+
+    def withdraw(self, amount):
+        if self.ledger.apply_batch(((WITHDRAW, self.index, NO_ACCOUNT, amount),)):
+            raise BalanceException(f"Insuffient balance, current balance: ${self.balance:.2f}")
+
+    def deposit(self, amount):
+        self.ledger.apply_batch(((DEPOSIT, self.index, NO_ACCOUNT, amount),))
+
+    def transfer(self, account, amount):
+        if self.ledger.apply_batch(((TRANSFER, self.index, account.index, amount),)):
+            raise BalanceException(f"Insuffient balance, current balance: ${self.balance:.2f}")
+
+
+if __name__ == '__main__':
+
+    count = 100_000
+    operations = [(i % 3, 0, 1, 10) for i in range(count)]  # deposit, withdraw, transfer, ...
+
+    # Per-call BankAccount methods (printing to /dev/null, the real console is even slower)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        islam = BankAccount("Islam", 1_000_000)
+        fatma = BankAccount("Fatma", 0)
+        start = time.perf_counter()
+        for kind, _, _, amount in operations:
+            if kind == DEPOSIT:
+                islam.deposit(amount)
+            elif kind == WITHDRAW:
+                islam.withdraw(amount)
+            else:
+                islam.transfer(fatma, amount)
+        per_call = time.perf_counter() - start
+
+    # Ledger batch, without and with the asynchronous logger
+    ledger = Ledger()
+    ledger.open_account("Islam", 1_000_000)
+    ledger.open_account("Fatma", 0)
+    start = time.perf_counter()
+    ledger.apply_batch(operations)
+    batch = time.perf_counter() - start
+
+    with open(os.devnull, "w") as devnull:
+        logged = Ledger(log=True, stream=devnull)
+        logged.open_account("Islam", 1_000_000)
+        logged.open_account("Fatma", 0)
+        start = time.perf_counter()
+        for i in range(0, count, 1000):
+            logged.apply_batch(operations[i:i + 1000])
+        batch_logged = time.perf_counter() - start
+        logged.close()
+
+    print(f"Balances match: {(islam.balance, fatma.balance) == (ledger.getBalance(0), ledger.getBalance(1))}")
+    print(f"Per-call methods:      {count / per_call:12,.0f} transactions/sec")
+    print(f"apply_batch:           {count / batch:12,.0f} transactions/sec")
+    print(f"apply_batch + logging: {count / batch_logged:12,.0f} transactions/sec")
+
+
+"""
+Key Points
+
+Append-only journal:
+    Committed transactions are stored in parallel arrays, nothing is ever rewritten.
+
+Batching:
+    apply_batch() does the validation and the balance updates of many transactions in one tight loop.
+
+Asynchronous logging:
+    Printing happens on a background thread, the ledger only queues (start, end) journal ranges.
+"""
@@ -0,0 +1,343 @@
+"""
+Money: an exact, compact amount of money stored as integer cents.
+
+Every account class keeps `balance` as a float, so 0.1 + 0.2 == 0.30000000000000004 and interest slowly drifts.
+decimal.Decimal is exact but every operation goes through a decimal context.
+
+Money is a tiny __slots__ object holding one int (`cents`):
+    - + and - are plain integer additions, exact at any size.
+    - Multiplying by a rate (interest) rounds half-to-even to the cent with round(), no Decimal involved.
+    - `cents` is a plain int, so balances fit straight into array('q') and come back with Money.from_cents().
+    - format(money, ".2f") works, so the existing f"${balance:.2f}" messages don't change.
+
+Numbers mixed with Money are read as dollars: Money(10) + 5 == Money("15.00"). Comparisons with other numbers
+are exact (Money("0.1") == 0.1 is False, because the float 0.1 is not exactly ten cents), and consistent with
+hash(). Strings are only accepted by the constructor: Money("5") == "5" is False and Money(5) + "5" raises
+TypeError. Float rates are read as the decimal they print as, Money("0.50") * 0.01 == Money("0.00") (half-to-even).
+
+MoneyBankAccount / MoneyInterestRewards / MoneyAddFees are the Bank_account.py classes with Money balances.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+from fractions import Fraction
+
+from Bank_account import BankAccount, InterestRewards, AddFees, BalanceException
+from interest_engine import round_half_even
+
+NUMBERS = (int, float, Fraction, Decimal)
+
+
+def parse_cents(text):
+    # "12.3" -> 1230, "-0.05" -> -5, without going through float or Decimal
+    text = text.strip().replace(",", "").lstrip("$")
+    sign = -1 if text.startswith("-") else 1
+    text = text.lstrip("+-")
+    dollars, _, fraction = text.partition(".")
+    if not (dollars or fraction) or not (dollars + fraction).isdigit():
+        raise ValueError(f"Invalid amount of money: {text!r}")
+    cents = int(dollars or 0) * 100 + int((fraction + "00")[:2])
+    rest = fraction[2:]
+    if rest.strip("0"):
+        # Round the digits after the cents half-to-even
+        half = "5" + "0" * (len(rest) - 1)
+        if rest > half or (rest == half and cents & 1):
+            cents += 1
+    return sign * cents
+
+
+def to_cents(amount):
+    if type(amount) is Money:
+        return amount.cents
+    if isinstance(amount, int):
+        return amount * 100  # whole dollars
+    if isinstance(amount, float):
+        return round(amount * 100)
+    if isinstance(amount, str):
+        return parse_cents(amount)
+    if isinstance(amount, Decimal):
+        return int((amount * 100).to_integral_value(ROUND_HALF_EVEN))
+    if isinstance(amount, Fraction):
+        return round(amount * 100)  # half-to-even
+    if isinstance(amount, Money):
+        return amount.cents
+    raise TypeError(f"Can't convert {type(amount).__name__} to Money")
+
+
+CENT_SUFFIXES = [f".{cents:02d}" for cents in range(100)]  # ".00" .. ".99"
+
+
+def format_cents(cents):
+    # 123456 -> "1234.56", the same text as f"{dollars:.2f}" without leaving the integers
+    if cents >= 0:
+        return f"{cents // 100}{CENT_SUFFIXES[cents % 100]}"  # faster than formatting a Decimal
+    dollars, cents = divmod(-cents, 100)
+    return f"-{dollars}{CENT_SUFFIXES[cents]}"
+
+
+class Money:
+    __slots__ = ("cents",)
+
+    def __init__(self, amount=0):
+        self.cents = to_cents(amount)
+
+    @classmethod
+    def from_cents(cls, cents):
+        money = object.__new__(cls)
+        money.cents = cents
+        return money
+
+    # ---- arithmetic ----
+
+    # Only Money and NUMBERS mix with Money, anything else (a str too) returns NotImplemented
+
+    def __add__(self, other):
+        if type(other) is Money:
+            cents = other.cents
+        elif isinstance(other, NUMBERS):
+            cents = to_cents(other)
+        else:
+            return NotImplemented
+        money = object.__new__(Money)
+        money.cents = self.cents + cents
+        return money
+
+    __radd__ = __add__  # sum() starts from 0
+
+    def __sub__(self, other):
+        if type(other) is Money:
+            cents = other.cents
+        elif isinstance(other, NUMBERS):
+            cents = to_cents(other)
+        else:
+            return NotImplemented
+        money = object.__new__(Money)
+        money.cents = self.cents - cents
+        return money
+
+    def __rsub__(self, other):
+        if not isinstance(other, NUMBERS):
+            return NotImplemented
+        return Money.from_cents(to_cents(other) - self.cents)
+
+    def __mul__(self, factor):
+        if isinstance(factor, int):
+            return Money.from_cents(self.cents * factor)
+        if isinstance(factor, float):
+            # The shortest decimal that reads back as this float: 0.01 is 1/100, not the binary value just above it
+            factor = Fraction(repr(factor))
+        if isinstance(factor, (Fraction, Decimal)):
+            return Money.from_cents(round(self.cents * Fraction(factor)))  # round() is half-to-even
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money.from_cents(-self.cents)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Money.from_cents(abs(self.cents))
+
+    # ---- comparisons ----
+
+    # Money against Money compares cents; against another number, the exact value Fraction(cents, 100),
+    # so equal values always have equal hashes. Anything else is not comparable.
+
+    def __eq__(self, other):
+        if type(other) is Money:
+            return self.cents == other.cents
+        if isinstance(other, NUMBERS):
+            return Fraction(self.cents, 100) == other
+        return NotImplemented
+
+    def __lt__(self, other):
+        if type(other) is Money:
+            return self.cents < other.cents
+        if isinstance(other, NUMBERS):
+            return Fraction(self.cents, 100) < other
+        return NotImplemented
+
+    def __le__(self, other):
+        if type(other) is Money:
+            return self.cents <= other.cents
+        if isinstance(other, NUMBERS):
+            return Fraction(self.cents, 100) <= other
+        return NotImplemented
+
+    def __gt__(self, other):
+        if type(other) is Money:
+            return self.cents > other.cents
+        if isinstance(other, NUMBERS):
+            return Fraction(self.cents, 100) > other
+        return NotImplemented
+
+    def __ge__(self, other):
+        if type(other) is Money:
+            return self.cents >= other.cents
+        if isinstance(other, NUMBERS):
+            return Fraction(self.cents, 100) >= other
+        return NotImplemented
+
+    def __hash__(self):
+        # Equal to the hash of the same number of dollars, like Money(5) == 5
+        return hash(Fraction(self.cents, 100))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    # ---- conversions ----
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __str__(self):
+        return format_cents(self.cents)
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        if not spec or spec == ".2f":
+            return str(self)
+        return format(Decimal(self.cents).scaleb(-2), spec)  # exact, only when printing
+
+    def __reduce__(self):
+        return (Money.from_cents, (self.cents,))
+
+
+class MoneyBankAccount(BankAccount):
+    # BankAccount with an exact balance: the account keeps plain int cents, `balance` hands out Money.
+    # deposit / withdraw convert the amount to cents once, then only do integer math and integer formatting
+    # (the hot path): no Money object is created.
+    def __init__(self, name, balance):
+        self.name = name
+        self.cents = to_cents(balance)
+        print(f"Account {name} has just created with ${self.balance:.2f} balance.")
+
+    @property
+    def balance(self):
+        return Money.from_cents(self.cents)
+
+    @balance.setter
+    def balance(self, value):
+        self.cents = to_cents(value)
+
+    def viableTransaction(self, amount):
+        if self.cents < to_cents(amount):
+            raise BalanceException(f"Insuffient balance, current balance: ${self.balance:.2f}")
+
+    def withdraw_cents(self, cents):
+        if self.cents < cents:
+            return False
+        self.cents -= cents
+        return True
+
+    def deposit_cents(self, cents):
+        self.cents += cents
+
+    def withdraw(self, amount):
+        cents = amount.cents if type(amount) is Money else to_cents(amount)
+        if self.cents < cents:
+            print(f"Insuffient balance, current balance: ${format_cents(self.cents)}")
+            return
+        balance = self.cents = self.cents - cents
+        if cents >= 0 and balance >= 0:  # format_cents() inlined, this message is most of the cost of withdraw()
+            print(f"Account {self.name} has withdrawn ${cents // 100}{CENT_SUFFIXES[cents % 100]}. "
+                  f"Remaining balance is ${balance // 100}{CENT_SUFFIXES[balance % 100]}")
+        else:
+            print(f"Account {self.name} has withdrawn ${format_cents(cents)}. Remaining balance is ${format_cents(balance)}")
+
+    def deposit(self, amount):
+        cents = amount.cents if type(amount) is Money else to_cents(amount)
+        balance = self.cents = self.cents + cents
+        if cents >= 0 and balance >= 0:  # format_cents() inlined, like in withdraw()
+            print(f"Account {self.name} has deposited ${cents // 100}{CENT_SUFFIXES[cents % 100]}. "
+                  f"New balance is ${balance // 100}{CENT_SUFFIXES[balance % 100]}")
+        else:
+            print(f"Account {self.name} has deposited ${format_cents(cents)}. New balance is ${format_cents(balance)}")
+
+
+class MoneyInterestRewards(MoneyBankAccount, InterestRewards):
+    def deposit(self, amount):
+        cents = to_cents(amount)
+        self.cents += cents + round_half_even(cents, 100)  # +1%, half-to-even to the cent
+        print(f"Account {self.name} has deposited ${format_cents(cents)}. New balance is ${format_cents(self.cents)}")
+
+
+class MoneyAddFees(MoneyInterestRewards, AddFees):
+    def __init__(self, name, balance):
+        super().__init__(name, balance)
+        self.fees = Money(5)
+
+    def withdraw(self, amount):
+        cents = to_cents(amount)
+        # Same check as AddFees: the fee may take the balance below zero
+        if self.cents < cents:
+            print(f"Insuffient balance, current balance: ${format_cents(self.cents)}")
+            return
+        self.cents -= cents + self.fees.cents
+        print(f"Account {self.name} has withdrawn ${format_cents(cents)} and ${self.fees:.2f} as fees. "
+              f"Remaining balance is ${format_cents(self.cents)}")
+
+
+if __name__ == '__main__':
+    import os
+    import timeit
+    from array import array
+    from contextlib import redirect_stdout
+
+    print(0.1 + 0.2, Money("0.1") + Money("0.2"))
+    balances = array('q', [Money("10.05").cents, Money(3).cents])
+    print([Money.from_cents(c) for c in balances])
+
+    saad = MoneyInterestRewards("Saad", 0)
+    saad.deposit(1000)  # Account Saad has deposited $1000.00. New balance is $1010.00
+    nour = MoneyAddFees("Nour", "1005")
+    nour.withdraw(500)  # Account Nour has withdrawn $500.00 and $5.00 as fees. Remaining balance is $500.00
+
+    # The hot path of deposit / withdraw, first as bare arithmetic (check the balance, add, subtract) ...
+    setups = {
+        "float": "balance = 1000.0; amount = 12.34",
+        "Decimal": "from decimal import Decimal; balance = Decimal('1000.00'); amount = Decimal('12.34')",
+        "int cents": "balance = 100000; amount = 1234",
+        "Money objects": "from money import Money; balance = Money(1000); amount = Money('12.34')",
+    }
+    statement = "balance = balance + amount\nif not balance < amount: balance = balance - amount"
+    for name, setup in setups.items():
+        seconds = min(timeit.repeat(statement, setup, number=200_000, repeat=5))
+        print(f"{name:<16}: {200_000 / seconds:12,.0f} add+compare+subtract/sec")
+
+    # ... then through the account methods, messages included (printed to a discarded stream).
+    # BankAccount works unchanged with a Decimal balance, that is the baseline to beat.
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        accounts = {
+            "Decimal account": (BankAccount("Islam", Decimal("1000.00")), Decimal("12.34")),
+            "Money account": (MoneyBankAccount("Islam", 1000), Money("12.34")),
+        }
+        timings = {}
+        for name, (account, amount) in accounts.items():
+            timings[name] = min(timeit.repeat(lambda: (account.deposit(amount), account.withdraw(amount)),
+                                              number=50_000, repeat=5))
+    for name, seconds in timings.items():
+        print(f"{name:<16}: {50_000 / seconds:12,.0f} deposit()+withdraw()/sec")
+
+
+"""
+Key Points
+
+Integer cents:
+    Money is exact because it never leaves the integers, Money("0.1") + Money("0.2") == Money("0.3").
+
+__slots__:
+    One int per object, no __dict__, and the int goes straight into array('q').
+
+Keep the cents on the hot path:
+    Every Money operation is a Python-level method call, slower than C Decimal. The accounts store the int cents
+    and only create Money objects when a balance is read, so deposit / withdraw are plain integer math and
+    integer formatting, faster than the same methods on a Decimal balance.
+
+Rounding:
+    Rates are applied with round(cents * Fraction(rate)), and the 1% of MoneyInterestRewards with an integer
+    divmod, both half-to-even without a decimal context.
+"""
@@ -0,0 +1,342 @@
+"""
+Persistence for account balances: a write-ahead log (WAL) plus periodic snapshots.
+
+    - Every balance mutation is appended to wal.log as a small fixed-size binary record
+      (sequence number, operation, account, amount, crc32). Records are written to a buffer and
+      fsync'ed in groups: one fsync makes `group_size` mutations durable at once (group fsync).
+    - Every `snapshot_every` mutations the whole state is written to snapshot.bin in a compact
+      binary format: a header, the balances as one raw array of doubles, and the names.
+      The snapshot is written to a temporary file and renamed, so a crash never leaves half a snapshot.
+      After that the log is truncated.
+    - Mutations that belong together (the debit and the credit of a transfer) are written between
+      BEGIN and COMMIT records by `with store.transaction():`. Replay applies them only once it
+      reads the COMMIT, so a crash in the middle of a transfer loses the whole transfer, never half of it.
+    - Recovery loads the last snapshot and replays only the records after its sequence number,
+      stopping at the first torn / corrupted record. The log never grows past `snapshot_every`
+      records, so startup time is bounded by the snapshot load, not by the history of the bank.
+
+PersistentMixin plugs the store into the BankAccount classes of Bank_account.py: `balance` becomes
+a property backed by the store, so deposit / withdraw / transfer (and the InterestRewards / AddFees
+overrides) are logged without changing them, and transfer() runs in a transaction.
+"""
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+
+from Bank_account import BankAccount, InterestRewards, AddFees
+
+OPEN = 1
+ADD = 2
+BEGIN = 3
+COMMIT = 4
+ROLLBACK = 5
+
+RECORD = struct.Struct("<QBqdI")  # sequence, operation, account, amount, crc32 of the first four fields
+NAME_LENGTH = struct.Struct("<I")  # OPEN records are followed by the length-prefixed account name
+SNAPSHOT_HEADER = struct.Struct("<8sQQQ")  # magic, last sequence, account count, names size
+MAGIC = b"BANKSNP1"
+
+
+class AccountStore:
+    def __init__(self, directory, group_size=256, snapshot_every=1_000_000):
+        self.directory = directory
+        self.group_size = group_size
+        self.snapshot_every = snapshot_every
+        self.wal_path = os.path.join(directory, "wal.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+
+        self.names = []
+        self.balances = array('d')
+        self.sequence = 0
+        self.unsynced = 0
+        self.logged = 0  # records in the current log
+        self.depth = 0  # nesting level of transaction()
+        self.undo = None  # (account, amount) of the open transaction, to roll back the memory state
+
+        os.makedirs(directory, exist_ok=True)
+        self.recover()
+        self.wal = open(self.wal_path, "ab")
+
+    # ---- recovery ----
+
+    def recover(self):
+        if os.path.exists(self.snapshot_path):
+            self.load_snapshot()
+        if os.path.exists(self.wal_path):
+            self.replay()
+
+    def load_snapshot(self):
+        with open(self.snapshot_path, "rb") as f:
+            magic, sequence, count, names_size = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.snapshot_path} is not an account snapshot")
+            balances = array('d')
+            balances.fromfile(f, count)
+            if sys.byteorder == "big":
+                balances.byteswap()  # snapshots are little-endian
+            names = f.read(names_size).decode().split("\0") if count else []
+        self.balances = balances
+        self.names = names
+        self.sequence = sequence
+
+    def replay(self):
+        valid = 0  # size of the log up to the last good record
+        with open(self.wal_path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        staged = None  # records of an open transaction, applied at its COMMIT
+        while offset + RECORD.size <= len(data):
+            sequence, operation, account, amount, crc = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size
+            if operation == OPEN:
+                if end + NAME_LENGTH.size > len(data):
+                    break
+                (length,) = NAME_LENGTH.unpack_from(data, end)
+                name_bytes = data[end + NAME_LENGTH.size:end + NAME_LENGTH.size + length]
+                if len(name_bytes) != length:
+                    break
+                end += NAME_LENGTH.size + length
+            else:
+                name_bytes = b""
+            if crc != zlib.crc32(data[offset:offset + RECORD.size - 4] + name_bytes):
+                break  # torn or corrupted write: everything after it was never acknowledged
+
+            self.logged += 1
+            offset = end
+            if operation == BEGIN:
+                staged = []  # a previous transaction without COMMIT was rolled back
+                continue
+            if operation == COMMIT:
+                for record in staged or ():
+                    self.redo(*record)
+                staged = None
+            elif operation == ROLLBACK:
+                staged = None
+            elif staged is not None:
+                staged.append((sequence, operation, account, amount, name_bytes))
+                continue
+            else:
+                self.redo(sequence, operation, account, amount, name_bytes)
+            valid = end
+
+        if valid != len(data):
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(valid)
+
+    def redo(self, sequence, operation, account, amount, name_bytes):
+        if sequence > self.sequence:  # older records are already part of the snapshot
+            if operation == OPEN:
+                self.names.append(name_bytes.decode())
+                self.balances.append(amount)
+            elif operation == ADD:
+                self.balances[account] += amount
+            self.sequence = sequence
+
+    # ---- logging ----
+
+    def append(self, operation, account, amount, name=b""):
+        if self.undo == []:
+            self.write(BEGIN, 0, 0)  # the first mutation of a transaction opens it in the log
+        if self.undo is not None and operation == ADD:
+            self.undo.append((account, amount))
+        self.write(operation, account, amount, name)
+        if self.logged >= self.snapshot_every and not self.depth:
+            self.snapshot()
+
+    def write(self, operation, account, amount, name=b""):
+        self.sequence += 1
+        head = RECORD.pack(self.sequence, operation, account, amount, 0)[:RECORD.size - 4]
+        record = head + struct.pack("<I", zlib.crc32(head + name))
+        if operation == OPEN:
+            record += NAME_LENGTH.pack(len(name)) + name
+        self.wal.write(record)
+        self.unsynced += 1
+        self.logged += 1
+        if self.unsynced >= self.group_size:
+            self.sync()
+
+    @contextmanager
+    def transaction(self):
+        # All mutations inside the block are replayed together or not at all
+        if self.depth == 0:
+            self.undo = []
+        self.depth += 1
+        try:
+            yield
+        except BaseException:
+            if self.depth == 1 and self.undo:
+                for account, amount in reversed(self.undo):
+                    self.balances[account] -= amount  # never committed: forget it in memory too
+                self.write(ROLLBACK, 0, 0)
+            raise
+        else:
+            if self.depth == 1 and self.undo:
+                self.write(COMMIT, 0, 0)
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                self.undo = None
+                if self.logged >= self.snapshot_every:
+                    self.snapshot()
+
+    def sync(self):
+        # Group fsync: everything appended since the last sync becomes durable with one system call
+        if self.unsynced:
+            self.wal.flush()
+            os.fsync(self.wal.fileno())
+            self.unsynced = 0
+
+    def snapshot(self):
+        self.sync()
+        names = "\0".join(self.names).encode()
+        balances = self.balances
+        if sys.byteorder == "big":
+            balances = array('d', balances)
+            balances.byteswap()
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix="snapshot.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(MAGIC, self.sequence, len(self.balances), len(names)))
+            balances.tofile(f)
+            f.write(names)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+
+        # The snapshot covers the whole log, start a new one
+        self.wal.close()
+        self.wal = open(self.wal_path, "wb")
+        os.fsync(self.wal.fileno())
+        self.logged = 0
+
+    def close(self):
+        self.sync()
+        self.wal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- accounts ----
+
+    def open_account(self, name, balance=0):
+        if self.depth:
+            raise RuntimeError("accounts can't be opened inside a transaction")
+        if "\0" in name:
+            raise ValueError("Account names can't contain NUL characters")
+        account = len(self.names)
+        self.names.append(name)
+        self.balances.append(balance)
+        self.append(OPEN, account, balance, name.encode())
+        return account
+
+    def add(self, account, amount):
+        if amount:
+            self.balances[account] += amount
+            self.append(ADD, account, amount)
+
+
+class PersistentMixin:
+    # Makes `balance` a property stored (and logged) in an AccountStore
+    def __init__(self, store, name, balance=0, account_id=None):
+        self.store = store
+        if account_id is None:
+            self.id = store.open_account(name, balance)
+            super().__init__(name, balance)
+        else:
+            self.id = account_id  # An account that already exists in the store (after recovery)
+            self.name = store.names[account_id]
+            if isinstance(self, AddFees):
+                self.fees = 5
+
+    @property
+    def balance(self):
+        return self.store.balances[self.id]
+
+    @balance.setter
+    def balance(self, value):
+        self.store.add(self.id, value - self.store.balances[self.id])
+
+    def transfer(self, account, amount):
+        # The debit and the credit are one transaction in the log
+        with self.store.transaction():
+            super().transfer(account, amount)
+
+
+class PersistentBankAccount(PersistentMixin, BankAccount):
+    pass
+
+
+class PersistentInterestRewards(PersistentMixin, InterestRewards):
+    pass
+
+
+class PersistentAddFees(PersistentMixin, AddFees):
+    pass
+
+
+if __name__ == '__main__':
+    from contextlib import redirect_stdout
+
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    mutations = 200_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            with AccountStore(directory, snapshot_every=10 ** 9) as store:
+                islam = PersistentBankAccount(store, "Islam", 1000)
+                fatma = PersistentInterestRewards(store, "Fatma", 0)
+                islam.transfer(fatma, 500)
+
+        with AccountStore(directory) as store:
+            print(f"Recovered: Islam {store.balances[0]:.2f}, Fatma {store.balances[1]:.2f}")
+
+        # Build a big bank, then compare recovery from the log alone vs snapshot + short log
+        with AccountStore(directory, snapshot_every=10 ** 9) as store:
+            start = time.perf_counter()
+            for i in range(accounts):
+                store.open_account(f"user{i}", 100)
+            for i in range(mutations):
+                store.add(i % accounts, 1)
+            print(f"Logged {accounts:,} accounts + {mutations:,} mutations in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        with AccountStore(directory) as store:
+            print(f"Recovery by replaying the whole log:  {time.perf_counter() - start:6.2f}s")
+            store.snapshot()
+            for i in range(1000):
+                store.add(i, 1)
+            total = sum(store.balances)
+
+        start = time.perf_counter()
+        with AccountStore(directory) as store:
+            print(f"Recovery from snapshot + 1,000 records: {time.perf_counter() - start:6.2f}s")
+            print(f"Totals match: {sum(store.balances) == total}")
+
+
+"""
+Key Points
+
+Write-ahead log:
+    A mutation is written to the log before anyone relies on it, the log is the source of truth after a crash.
+
+Group fsync:
+    fsync is the expensive part, syncing once per group of records amortizes it.
+
+Snapshots:
+    A compact binary image of all balances, recovery = load snapshot + replay the short tail of the log.
+
+Torn writes:
+    Every record carries a crc32, replay stops at the first record that was not fully written.
+
+Transactions:
+    BEGIN ... COMMIT groups records, a transfer cut in half by a crash is dropped as a whole.
+"""
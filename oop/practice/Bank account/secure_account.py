@@ -0,0 +1,117 @@
+"""
+PIN protection for the encapsulated BankAccount (oop/2. encapsulation.py).
+
+The lesson version keeps the PIN in plain text ("1234") and compares it with == on every call.
+SecureBankAccount keeps the same public API (get_balance, withdraw(amount, pin), deposit(amount, pin)) but:
+
+    - Stores only a random salt and a PBKDF2-HMAC-SHA256 hash of the PIN. The KDF is slow on purpose,
+      so guessing all 4-digit PINs from a leaked hash is expensive.
+    - Compares digests with hmac.compare_digest(), which takes the same time whether the first
+      or the last byte differs (no timing hints for an attacker).
+    - After a successful check it opens a short session: a fast HMAC of the PIN under a random
+      per-account key, valid for `session_ttl` seconds. A burst of operations by the same holder
+      is verified with that HMAC instead of running the KDF again.
+      A PIN that does not match the session always goes through the full KDF.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+ITERATIONS = 200_000
+
+
+class SecureBankAccount:
+    def __init__(self, account_holder, initial_balance, pin, session_ttl=30):
+        self.account_holder = account_holder   # Public attribute
+        self._balance = initial_balance   # Protected attribute
+        self.session_ttl = session_ttl  # 0 disables the session cache
+
+        self.__salt = os.urandom(16)   # private attributes
+        self.__pin_hash = self.__hash_pin(pin)
+        self.__session_key = secrets.token_bytes(32)
+        self.__session = None  # (digest, expires_at)
+
+    # public method
+    def get_balance(self):
+        return self._balance
+
+    # protected method
+    def _update_balance(self, amount):
+        self._balance += amount
+
+    def end_session(self):
+        # Forget the cached verification, the next operation runs the KDF again
+        self.__session = None
+
+    # private methods
+    def __hash_pin(self, pin):
+        return hashlib.pbkdf2_hmac("sha256", pin.encode(), self.__salt, ITERATIONS)
+
+    def __session_digest(self, pin):
+        return hmac.new(self.__session_key, pin.encode(), hashlib.sha256).digest()
+
+    def __validate_pin(self, pin):
+        now = time.monotonic()
+        if self.__session is not None:
+            digest, expires_at = self.__session
+            if now < expires_at and hmac.compare_digest(digest, self.__session_digest(pin)):
+                return True
+
+        if not hmac.compare_digest(self.__pin_hash, self.__hash_pin(pin)):
+            return False
+
+        if self.session_ttl > 0:
+            self.__session = (self.__session_digest(pin), now + self.session_ttl)
+        return True
+
+    def withdraw(self, amount, pin):
+        if self.__validate_pin(pin):
+            if amount > self._balance:
+                print("Insufficient funds")
+            else:
+                self._update_balance(-amount)
+                print(f"Withdrew {amount}. New balance: {self._balance}")
+        else:
+            print("Invalid PIN")
+
+    def deposit(self, amount, pin):
+        if self.__validate_pin(pin):
+            self._update_balance(amount)
+            print(f"Deposit {amount}. New balance: {self._balance}")
+        else:
+            print("Invalid PIN")
+
+
+if __name__ == '__main__':
+    from contextlib import redirect_stdout
+
+    account = SecureBankAccount("Islam", 1000, "1234")
+    account.withdraw(500, "1234")  # Withdrew 500. New balance: 500
+    account.withdraw(500, "123")  # Invalid PIN
+    account.deposit(500, "1234")  # Deposit 500. New balance: 1000
+
+    for ttl, operations in ((0, 20), (30, 20_000)):
+        account = SecureBankAccount("Islam", 0, "1234", session_ttl=ttl)
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            start = time.perf_counter()
+            for _ in range(operations):
+                account.deposit(1, "1234")
+            elapsed = time.perf_counter() - start
+        label = "with session cache" if ttl else "KDF on every call"
+        print(f"{label:<20}: {operations / elapsed:10,.0f} operations/sec")
+
+
+"""
+Key Points
+
+Salted slow hash:
+    The PIN itself is never stored, only PBKDF2(pin, salt), which is slow to brute force.
+
+Constant-time comparison:
+    hmac.compare_digest() does not stop at the first different byte.
+
+Session cache:
+    A verified holder gets a short window where a cheap HMAC check replaces the KDF.
+"""